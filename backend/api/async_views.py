@@ -0,0 +1,93 @@
+"""Асинхронные точки входа горячих эндпоинтов для запуска под ASGI.
+
+В Django 3.2 нет асинхронного ORM, а DRF не поддерживает async-view,
+поэтому здесь асинхронные обёртки над теми же вьюсетами: запрос целиком
+(права, фильтры, кэш, сериализация и рендеринг) выполняется в пуле из
+ASYNC_VIEWS_THREADS потоков, каждый со своим соединением с базой.
+Обычные sync-view Django 3.2 под ASGI выполняет в одном общем потоке,
+то есть по одному запросу за раз на процесс. Маршруты подключаются
+в api.urls при ASYNC_VIEWS=1.
+"""
+import asyncio
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.urls import re_path
+
+from api import metrics
+
+LIST = {'get': 'list', 'post': 'create'}
+DETAIL = {
+    'get': 'retrieve', 'put': 'update', 'patch': 'partial_update',
+    'delete': 'destroy',
+}
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEWS_THREADS, thread_name_prefix='async-view'
+)
+
+
+def detach(response):
+    """Отрисованный ответ DRF как обычный HttpResponse.
+
+    Иначе ASGI-обработчик снова вызовет render() в общем sync-потоке.
+    """
+    plain = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        plain[header] = value
+    plain.cookies = response.cookies
+    return plain
+
+
+def run_view(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        with metrics.track_queries():
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response = detach(response.render())
+        return response
+    finally:
+        close_old_connections()
+
+
+def as_async_view(viewset, actions):
+    """Async-view вьюсета с теми же action, что у маршрутов роутера."""
+    actions = {method: action for method, action in actions.items()
+               if hasattr(viewset, action)}
+    view = viewset.as_view(actions)
+
+    async def async_view(request, *args, **kwargs):
+        # Контекст копируется, чтобы в потоке были видны метрики запроса.
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            executor,
+            partial(context.run, run_view, view, request, *args, **kwargs),
+        )
+
+    async_view.cls = view.cls
+    async_view.initkwargs = view.initkwargs
+    async_view.actions = view.actions
+    async_view.csrf_exempt = True
+    return async_view
+
+
+def async_routes(prefix, viewset):
+    """Список и карточка, как у DefaultRouter, без суффиксов формата.
+
+    Адреса action списка (feed и др.) остаются за роутером.
+    """
+    extra = '|'.join(re.escape(action.url_path)
+                     for action in viewset.get_extra_actions()
+                     if not action.detail)
+    lookup = rf'(?!(?:{extra})/$)' if extra else ''
+    return [
+        re_path(rf'^{prefix}/$', as_async_view(viewset, LIST)),
+        re_path(rf'^{prefix}/{lookup}(?P<pk>[^/.]+)/$',
+                as_async_view(viewset, DETAIL)),
+    ]
@@ -0,0 +1,80 @@
+"""Аутентификация по токену без запроса к базе на каждый вызов API.
+
+Пара токен → пользователь кэшируется в LRU процесса на TOKEN_CACHE_TTL
+секунд и в общем кэше на TOKEN_CACHE_TIMEOUT. Сбрасывается сигналами
+при удалении токена (logout) и при сохранении пользователя (смена
+пароля, деактивация); в других процессах — не позже чем через
+TOKEN_CACHE_TTL. Хэш пароля в кэш не попадает: поле отложено и
+загружается из базы при обращении.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.base import DEFERRED
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from recipes.reference import LocalLRUCache
+from users.models import User
+
+CACHE_KEY = 'auth_token:{}'
+SKIPPED_FIELDS = ('password',)
+
+local_cache = LocalLRUCache(
+    settings.TOKEN_CACHE_MAXSIZE, settings.TOKEN_CACHE_TTL
+)
+
+
+def cache_key(key):
+    # Сам токен в ключах общего кэша не светится.
+    return CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def dump_user(user):
+    return {field.attname: getattr(user, field.attname)
+            for field in User._meta.concrete_fields
+            if field.attname not in SKIPPED_FIELDS}
+
+
+def load_user(values):
+    """Новый экземпляр на каждый запрос: view могут его менять."""
+    return User.from_db(DEFAULT_DB_ALIAS, list(values), [
+        values.get(field.attname, DEFERRED)
+        for field in User._meta.concrete_fields
+    ])
+
+
+def _delete(keys):
+    for key in keys:
+        local_cache.delete(key)
+    cache.delete_many([cache_key(key) for key in keys])
+
+
+def invalidate_tokens(*keys):
+    """Сбрасывает токены сразу и ещё раз после коммита транзакции."""
+    _delete(keys)
+    transaction.on_commit(lambda: _delete(keys))
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        entry = local_cache.get(key)
+        if entry is None:
+            entry = cache.get(cache_key(key))
+            if entry is None:
+                user, token = super().authenticate_credentials(key)
+                entry = (token.created, dump_user(user))
+                cache.set(cache_key(key), entry,
+                          settings.TOKEN_CACHE_TIMEOUT)
+            local_cache.set(key, entry)
+        created, values = entry
+        user = load_user(values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return user, Token(key=key, user=user, created=created)
@@ -0,0 +1,142 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from recipes import reference
+from recipes.models import Ingredient
+from recipes.versions import INGREDIENTS, bump_version, get_version
+
+
+def normalize(text):
+    return text.strip().casefold()
+
+
+class PrefixIndex:
+    """Отсортированный индекс названий и слов для поиска через bisect."""
+
+    def __init__(self, ingredients):
+        self.items = [
+            {'id': pk, 'name': name, 'measurement_unit': unit}
+            for pk, name, unit in ingredients
+        ]
+        self.names = sorted(
+            (normalize(item['name']), position)
+            for position, item in enumerate(self.items)
+        )
+        self.words = sorted(
+            (word, position)
+            for position, item in enumerate(self.items)
+            for word in normalize(item['name']).split()[1:]
+        )
+
+    @staticmethod
+    def _prefix_scan(index, query):
+        start = bisect_left(index, (query,))
+        for key, position in index[start:]:
+            if not key.startswith(query):
+                break
+            yield position
+
+    def search(self, query, limit):
+        query = normalize(query)
+        found = []
+        seen = set()
+        for index in (self.names, self.words):
+            for position in self._prefix_scan(index, query):
+                if position not in seen:
+                    seen.add(position)
+                    found.append(position)
+        if len(found) < limit:
+            for key, position in self.names:
+                if query in key and position not in seen:
+                    found.append(position)
+                    if len(found) >= limit:
+                        break
+        return [self.items[position] for position in found[:limit]]
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def get_index(self):
+        now = time.monotonic()
+        if self._index is not None and now - self._checked < getattr(
+                settings, 'INGREDIENT_INDEX_CHECK_INTERVAL', 1):
+            return self._index
+        version = get_version(INGREDIENTS)
+        with self._lock:
+            if self._index is None or version != self._version:
+                if version != self._version:
+                    reference.invalidate(INGREDIENTS)
+                self._index = PrefixIndex(
+                    (item['id'], item['name'], item['measurement_unit'])
+                    for item in reference.get_reference(INGREDIENTS).values()
+                )
+                self._version = version
+            self._checked = now
+        return self._index
+
+    def reset(self):
+        self._index = None
+
+    def search(self, query, limit):
+        return self.get_index().search(query, limit)
+
+
+class TrigramBackend:
+    """Поиск по GIN-индексу pg_trgm (см. миграцию recipes 0006)."""
+
+    @staticmethod
+    def search(query, limit):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        query = query.strip()
+        return list(Ingredient.objects.filter(
+            name__icontains=query
+        ).annotate(
+            rank=Case(
+                When(name__istartswith=query, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            ),
+            similarity=TrigramSimilarity('name', query),
+        ).order_by('rank', '-similarity', 'name').values(
+            'id', 'name', 'measurement_unit'
+        )[:limit])
+
+
+memory_backend = MemoryBackend()
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return TrigramBackend
+    return memory_backend
+
+
+def autocomplete(query, limit=None):
+    if limit is None:
+        limit = settings.INGREDIENT_AUTOCOMPLETE_LIMIT
+    if not query.strip():
+        return []
+    return get_backend().search(query, limit)
+
+
+def warm_up():
+    """Строит индекс подсказок до первого запроса (см. gunicorn.conf)."""
+    if get_backend() is memory_backend:
+        memory_backend.get_index()
+
+
+def invalidate_index():
+    bump_version(INGREDIENTS)
+    reference.invalidate(INGREDIENTS)
+    memory_backend.reset()
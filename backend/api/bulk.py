@@ -0,0 +1,110 @@
+"""Пакетное добавление и удаление рецептов в избранном и корзине.
+
+Вставка одним bulk_create(ignore_conflicts=True), удаление — обычным
+delete() внутри bookkeeping_muted(). Построчные обработчики из
+api.signals при этом ничего не делают, а счётчики рецептов,
+агрегированный список покупок и его кэш обновляются здесь сразу для
+всего пакета. Каждый пакет выполняется в одной транзакции, пакеты
+и одиночные добавления и удаления одного пользователя — по очереди
+(lock_user), иначе конкурентная вставка между find_recipes и
+bulk_create учла бы рецепт дважды.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Sum
+
+from api.cache import invalidate_shopping_list
+from api.signals import bookkeeping_muted
+from recipes.models import (
+    Favorite, IngredientAmount, Recipe, Shopping, ShoppingListItem,
+)
+from users.models import User
+
+ADDED = 'added'
+REMOVED = 'removed'
+ALREADY_ADDED = 'already_added'
+NOT_ADDED = 'not_added'
+NOT_FOUND = 'not_found'
+
+COUNTERS = {Favorite: 'favorites_count', Shopping: 'shopping_count'}
+
+
+def lock_user(user):
+    """Блокирует строку пользователя до конца транзакции."""
+    list(User.objects.select_for_update().filter(
+        pk=user.pk
+    ).values_list('pk', flat=True))
+
+
+def find_recipes(model, user, recipe_ids):
+    """{id: есть ли уже у пользователя} для существующих рецептов."""
+    return dict(Recipe.objects.filter(pk__in=recipe_ids).annotate(
+        present=Exists(model.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        ))
+    ).values_list('pk', 'present'))
+
+
+def update_side_effects(model, user, recipe_ids, sign):
+    if not recipe_ids:
+        return
+    Recipe.objects.filter(pk__in=recipe_ids).increment(
+        COUNTERS[model], sign
+    )
+    if model is not Shopping:
+        return
+    ShoppingListItem.objects.apply_delta([user.id], {
+        ingredient_id: sign * amount
+        for ingredient_id, amount in IngredientAmount.objects.filter(
+            recipe__in=recipe_ids
+        ).values('ingredient_id').annotate(
+            amount=Sum('amount')
+        ).values_list('ingredient_id', 'amount').order_by()
+    })
+    invalidate_shopping_list(user.id)
+
+
+@transaction.atomic
+def add_recipes(model, user, recipe_ids):
+    """Добавляет рецепты; возвращает {id: статус}."""
+    lock_user(user)
+    found = find_recipes(model, user, recipe_ids)
+    new_ids = sorted(pk for pk, present in found.items() if not present)
+    model.objects.bulk_create(
+        [model(user=user, recipe_id=pk) for pk in new_ids],
+        ignore_conflicts=True,
+    )
+    update_side_effects(model, user, new_ids, 1)
+    return {pk: NOT_FOUND if pk not in found
+            else ALREADY_ADDED if found[pk] else ADDED
+            for pk in recipe_ids}
+
+
+@transaction.atomic
+def remove_recipes(model, user, recipe_ids):
+    """Удаляет рецепты; возвращает {id: статус}."""
+    lock_user(user)
+    found = find_recipes(model, user, recipe_ids)
+    removed_ids = sorted(pk for pk, present in found.items() if present)
+    # Список покупок вычитается до удаления, как в shopping_removed.
+    update_side_effects(model, user, removed_ids, -1)
+    with bookkeeping_muted():
+        model.objects.filter(user=user, recipe__in=removed_ids).delete()
+    return {pk: NOT_FOUND if pk not in found
+            else REMOVED if found[pk] else NOT_ADDED
+            for pk in recipe_ids}
+
+
+@transaction.atomic
+def clear_cart(user):
+    """Очищает корзину; возвращает число рецептов."""
+    lock_user(user)
+    Recipe.objects.filter(shopping__user=user).increment(
+        COUNTERS[Shopping], -1
+    )
+    # Не _raw_delete: у Shopping есть получатели сигналов, поэтому ORM
+    # сначала выбирает строки, зато каскады и сигналы остаются в силе.
+    with bookkeeping_muted():
+        removed, _ = Shopping.objects.filter(user=user).delete()
+    ShoppingListItem.objects.filter(user=user).delete()
+    invalidate_shopping_list(user.id)
+    return removed
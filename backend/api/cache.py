@@ -0,0 +1,50 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.utils import get_shopping_list
+from recipes.models import Shopping
+
+SHOPPING_LIST_KEY = 'shopping_list:{}'
+
+shopping_list_stats = Counter(hits=0, misses=0)
+
+
+def get_cached_shopping_list(user):
+    """Строки списка покупок из кэша или потоком из базы.
+
+    Списки не длиннее SHOPPING_LIST_CACHE_MAX_ROWS собираются по ходу
+    выдачи и кладутся в кэш, когда поток дочитан до конца. Длинные
+    идут прямо из итератора ShoppingListItem и в памяти не копятся.
+    """
+    key = SHOPPING_LIST_KEY.format(user.id)
+    rows = cache.get(key)
+    if rows is not None:
+        shopping_list_stats['hits'] += 1
+        return iter(rows)
+    shopping_list_stats['misses'] += 1
+    return _stream_and_cache(key, get_shopping_list(user))
+
+
+def _stream_and_cache(key, rows):
+    collected = []
+    for row in rows:
+        if collected is not None:
+            collected.append(row)
+            if len(collected) > settings.SHOPPING_LIST_CACHE_MAX_ROWS:
+                collected = None
+        yield row
+    if collected is not None:
+        cache.set(key, collected, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+
+
+def invalidate_shopping_list(*user_ids):
+    cache.delete_many([SHOPPING_LIST_KEY.format(pk) for pk in user_ids])
+
+
+def invalidate_recipe_shopping_lists(**recipe_lookup):
+    """Сбрасывает списки покупок всех, у кого рецепт лежит в корзине."""
+    invalidate_shopping_list(*Shopping.objects.filter(
+        **recipe_lookup
+    ).values_list('user_id', flat=True))
@@ -0,0 +1,61 @@
+"""Условные GET-запросы: ETag, 304 без сериализации.
+
+Last-Modified не отправляется: представление рецепта зависит ещё от
+автора, тегов и справочников, и дата изменения рецепта её не отражает.
+"""
+import hashlib
+from functools import partial
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from recipes.versions import get_version
+
+
+def make_etag(*parts):
+    return '"{}"'.format(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def recipe_fingerprint(recipe):
+    """Всё, от чего зависит представление рецепта, кроме справочников."""
+    author = recipe.author
+    return (
+        recipe.pk, recipe.updated_at.timestamp(),
+        recipe.is_favorited, recipe.is_in_shopping_cart, recipe.is_subscribed,
+        author.email, author.username, author.first_name, author.last_name,
+    )
+
+
+def conditional(request, render, etag=None):
+    """Отвечает 304, если ETag клиента актуален, иначе render()."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render()
+        if not 200 <= response.status_code < 300:
+            return response
+    if etag:
+        response['ETag'] = etag
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class VersionETagMixin:
+    """ETag справочника по счётчику версий из recipes.versions."""
+    etag_version = None
+
+    def get_etag(self, request):
+        return make_etag(
+            request.get_full_path(), request.accepted_media_type,
+            get_version(self.etag_version),
+        )
+
+    def list(self, request, *args, **kwargs):
+        return conditional(
+            request, partial(super().list, request, *args, **kwargs),
+            etag=self.get_etag(request),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional(
+            request, partial(super().retrieve, request, *args, **kwargs),
+            etag=self.get_etag(request),
+        )
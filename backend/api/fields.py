@@ -0,0 +1,92 @@
+import base64
+import binascii
+import uuid
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, UnidentifiedImageError
+from rest_framework import serializers
+
+BASE64_CHUNK_SIZE = 64 * 1024
+
+
+def iter_base64_chunks(encoded):
+    """Куски без пробельных символов (переносы строк MIME), выровненные
+    по 4 знака, чтобы каждый декодировался независимо."""
+    tail = ''
+    for start in range(0, len(encoded), BASE64_CHUNK_SIZE):
+        chunk = tail + ''.join(
+            encoded[start:start + BASE64_CHUNK_SIZE].split()
+        )
+        end = len(chunk) - len(chunk) % 4
+        tail = chunk[end:]
+        yield chunk[:end]
+    if tail:
+        yield tail
+
+
+class SpooledBase64ImageField(serializers.ImageField):
+    """Картинка строкой base64 (data URL) или файлом multipart.
+
+    base64 декодируется кусками во временный файл, который остаётся
+    в памяти только до FILE_UPLOAD_MAX_MEMORY_SIZE. Размер проверяется
+    до декодирования, число пикселей — по заголовку, до распаковки.
+    """
+    default_error_messages = {
+        'invalid_base64': 'Некорректная строка base64.',
+        'too_large': 'Файл больше {max_size} байт.',
+        'too_many_pixels': 'Изображение больше {max_pixels} пикселей.',
+        'invalid_image': 'Загрузите корректное изображение.',
+    }
+
+    def to_internal_value(self, data):
+        decoded = isinstance(data, str)
+        if decoded:
+            data = self.decode_base64(data)
+        elif getattr(data, 'size', 0) > settings.RECIPE_IMAGE_MAX_SIZE:
+            self.fail('too_large', max_size=settings.RECIPE_IMAGE_MAX_SIZE)
+        file = serializers.FileField.to_internal_value(self, data)
+        extension = self.check_image(file)
+        if decoded:
+            file.name = f'{file.name}.{extension}'
+        return file
+
+    def decode_base64(self, data):
+        header, _, encoded = data.rpartition(';base64,')
+        max_size = settings.RECIPE_IMAGE_MAX_SIZE
+        length = len(encoded) - encoded.count('\n') - encoded.count('\r')
+        if length * 3 // 4 > max_size + 2:
+            self.fail('too_large', max_size=max_size)
+        spooled = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        size = 0
+        try:
+            for chunk in iter_base64_chunks(encoded):
+                size += spooled.write(base64.b64decode(chunk, validate=True))
+        except (binascii.Error, ValueError):
+            spooled.close()
+            self.fail('invalid_base64')
+        spooled.seek(0)
+        content_type = header.replace('data:', '') or None
+        return UploadedFile(spooled, name=str(uuid.uuid4()), size=size,
+                            content_type=content_type)
+
+    def check_image(self, file):
+        """Проверяет картинку, не распаковывая пиксели целиком."""
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        file.seek(0)
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+                if width * height > max_pixels:
+                    self.fail('too_many_pixels', max_pixels=max_pixels)
+                image.verify()
+                extension = (image.format or 'jpeg').lower()
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            self.fail('invalid_image')
+        file.seek(0)
+        return 'jpg' if extension == 'jpeg' else extension
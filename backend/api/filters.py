@@ -1,7 +1,9 @@
+from django.db.models import F
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe
+from recipes.search import search_recipes
 from users.models import User
 
 
@@ -15,6 +17,15 @@ class AuthorTagFilter(FilterSet):
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        method='filter_ordering',
+        choices=(
+            ('popular', 'По числу добавлений в избранное'),
+            ('trending', 'Популярные за последнее время'),
+            ('quickest', 'Быстрые в приготовлении'),
+        ),
+    )
 
     def filter_is_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
@@ -26,6 +37,16 @@ class AuthorTagFilter(FilterSet):
             return queryset.filter(shopping__user=self.request.user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_ordering(self, queryset, name, value):
+        if value == 'quickest':
+            return queryset.order_by('cooking_time', '-pub_date', '-id')
+        return queryset.order_by(
+            F(f'score__{value}').desc(nulls_last=True), '-pub_date', '-id'
+        )
+
     class Meta:
         model = Recipe
         fields = ('author', 'tags')
@@ -0,0 +1,218 @@
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Shopping, Tag
+from users.models import Subscription
+
+
+def percentile(timings, share):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет горячие эндпоинты API: p50/p95, SQL-запросы на '
+            'запрос и пропускную способность в одном потоке. База — '
+            'текущая из настроек (SQLite или PostgreSQL через DB_ENGINE), '
+            'заполненная командой seed. Результаты пишутся в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Замеров на эндпоинт.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Запросов на прогрев перед замером.'
+        )
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Отключить кэш (DummyCache), чтобы мерить работу с базой.'
+        )
+        parser.add_argument(
+            '--only', default='',
+            help='Мерить только эндпоинты, в имени которых есть строка.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для JSON, по умолчанию benchmark-<база>-<время>.json.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого запуска для сравнения p50.'
+        )
+
+    def get_endpoints(self):
+        """(имя, нужен ли пользователь, список адресов по кругу)."""
+        cart = Shopping.objects.values('user_id').first()
+        subscription = Subscription.objects.values('user_id').first()
+        if cart is None or subscription is None:
+            raise CommandError('Нет корзин или подписок: запустите seed.')
+        self.user_id = subscription['user_id']
+        self.cart_user_id = cart['user_id']
+        recipes = list(Recipe.objects.values_list('pk', flat=True)[:20])
+        authors = list(Recipe.objects.values_list(
+            'author_id', flat=True
+        ).distinct()[:10])
+        slugs = list(Tag.objects.values_list('slug', flat=True))
+        prefixes = sorted({
+            name[:3] for name in Ingredient.objects.values_list(
+                'name', flat=True
+            )[:200]
+        })[:20]
+        recipe_list = '/api/recipes/'
+        return (
+            ('recipes', False, [recipe_list]),
+            ('recipes_page_5', False, [f'{recipe_list}?page=5']),
+            ('recipes_cursor', False,
+             [f'{recipe_list}?pagination=cursor']),
+            ('recipes_tags', False,
+             [f'{recipe_list}?tags={slug}' for slug in slugs]),
+            ('recipes_author', False,
+             [f'{recipe_list}?author={pk}' for pk in authors]),
+            ('recipes_search', False,
+             [f'{recipe_list}?search={word}'
+              for word in ('суп', 'пирог', 'салат')]),
+            ('recipes_popular', False, [f'{recipe_list}?ordering=popular']),
+            ('recipes_trending', False,
+             [f'{recipe_list}?ordering=trending']),
+            ('recipes_quickest', False,
+             [f'{recipe_list}?ordering=quickest']),
+            ('recipes_user', True, [recipe_list]),
+            ('recipes_is_favorited', True,
+             [f'{recipe_list}?is_favorited=1']),
+            ('recipes_is_in_shopping_cart', 'cart',
+             [f'{recipe_list}?is_in_shopping_cart=1']),
+            ('recipes_feed', True, ['/api/recipes/feed/']),
+            ('recipe_detail', False,
+             [f'{recipe_list}{pk}/' for pk in recipes]),
+            ('recipe_detail_user', True,
+             [f'{recipe_list}{pk}/' for pk in recipes]),
+            ('subscriptions', True,
+             ['/api/users/subscriptions/?recipes_limit=3']),
+            ('shopping_list_txt', 'cart',
+             ['/api/recipes/download_shopping_cart/?format=txt']),
+            ('shopping_list_pdf', 'cart',
+             ['/api/recipes/download_shopping_cart/?format=pdf']),
+            ('ingredient_search', False,
+             [f'/api/ingredients/?name={prefix}' for prefix in prefixes]),
+            ('tags', False, ['/api/tags/']),
+        )
+
+    def get_client(self, user):
+        client = APIClient()
+        if user:
+            user_id = self.cart_user_id if user == 'cart' else self.user_id
+            token, _ = Token.objects.get_or_create(user_id=user_id)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    @staticmethod
+    def fetch(client, url):
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, client, urls, warmup, count):
+        for number in range(warmup):
+            self.fetch(client, urls[number % len(urls)])
+        timings, queries, statuses = [], 0, set()
+        started = time.perf_counter()
+        for number in range(count):
+            with CaptureQueriesContext(connection) as context:
+                request_started = time.perf_counter()
+                response = self.fetch(client, urls[number % len(urls)])
+                timings.append(time.perf_counter() - request_started)
+            queries += len(context)
+            statuses.add(response.status_code)
+        elapsed = time.perf_counter() - started
+        return {
+            'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+            'mean_ms': round(statistics.mean(timings) * 1000, 2),
+            'queries': round(queries / count, 2),
+            'rps': round(count / elapsed, 1),
+            'statuses': sorted(statuses),
+        }
+
+    def handle(self, *args, **options):
+        overrides = {'ALLOWED_HOSTS': ['testserver']}
+        if options['no_cache']:
+            overrides['CACHES'] = {'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+            }}
+        results = {}
+        with override_settings(**overrides):
+            for name, user, urls in self.get_endpoints():
+                if options['only'] not in name:
+                    continue
+                result = self.measure(
+                    self.get_client(user), urls,
+                    options['warmup'], options['requests'],
+                )
+                results[name] = result
+                self.stdout.write(
+                    f'{name:<28} p50 {result["p50_ms"]:8.2f} мс  '
+                    f'p95 {result["p95_ms"]:8.2f} мс  '
+                    f'SQL {result["queries"]:5.1f}  '
+                    f'{result["rps"]:7.1f} запр./с  {result["statuses"]}'
+                )
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'database_version': self.get_database_version(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'cache': ('dummy' if options['no_cache']
+                          else settings.CACHES['default']['BACKEND']),
+                'requests': options['requests'],
+                'recipes': Recipe.objects.count(),
+            },
+            'results': results,
+        }
+        output = options['output'] or (
+            f'benchmark-{connection.vendor}-'
+            f'{timezone.now():%Y%m%d-%H%M%S}.json'
+        )
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {output}'))
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    @staticmethod
+    def get_database_version():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('SELECT sqlite_version()')
+            else:
+                cursor.execute('SELECT version()')
+            return cursor.fetchone()[0]
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as file:
+            previous = json.load(file)['results']
+        self.stdout.write(f'Сравнение p50 с {path}:')
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            before, after = previous[name]['p50_ms'], result['p50_ms']
+            change = (after - before) / before * 100 if before else 0
+            self.stdout.write(
+                f'{name:<28} {before:8.2f} → {after:8.2f} мс '
+                f'({change:+.0f}%), SQL {previous[name]["queries"]} → '
+                f'{result["queries"]}'
+            )
@@ -0,0 +1,235 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+# Один процесс каждого сервера: сравнивается конкурентность на процесс.
+SERVERS = {
+    'wsgi': (
+        ['-m', 'gunicorn', 'foodgram.wsgi:application',
+         '--bind', '127.0.0.1:{port}', '--workers', '{workers}',
+         '--threads', '{threads}'],
+        {'ASYNC_VIEWS': '0'},
+    ),
+    'asgi': (
+        ['-m', 'uvicorn', 'foodgram.asgi:application', '--host', '127.0.0.1',
+         '--port', '{port}', '--workers', '{workers}', '--no-access-log'],
+        {'ASYNC_VIEWS': '1'},
+    ),
+    # Под ASGI без async-view: sync-view Django выполняет в одном потоке.
+    'asgi-sync': (
+        ['-m', 'uvicorn', 'foodgram.asgi:application', '--host', '127.0.0.1',
+         '--port', '{port}', '--workers', '{workers}', '--no-access-log'],
+        {'ASYNC_VIEWS': '0'},
+    ),
+}
+READY_TIMEOUT = 30
+
+
+def percentile(timings, share):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает конкурентность горячих GET-эндпоинтов (список и '
+            'карточка рецепта, поиск ингредиентов, теги) под gunicorn '
+            '(WSGI) и uvicorn (ASGI с ASYNC_VIEWS=1): для каждого уровня '
+            'одновременных клиентов — запросы в секунду, p50/p95 и ошибки. '
+            'Серверы запускаются сами на свободных портах с текущим '
+            'окружением; --url мерит уже запущенный сервер.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers', default='wsgi,asgi',
+            help=f'Через запятую из: {", ".join(SERVERS)}.'
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера вместо --servers.'
+        )
+        parser.add_argument(
+            '--concurrency', default='1,8,32',
+            help='Уровни одновременных клиентов через запятую.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый уровень.'
+        )
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument(
+            '--wsgi-threads', type=int, default=1,
+            help='Потоков gunicorn (больше 1 — воркер gthread).'
+        )
+        parser.add_argument(
+            '--auth', action='store_true',
+            help='Запросы с токеном пользователя, а не гостевые.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для JSON, по умолчанию concurrency-<время>.json.'
+        )
+
+    def get_paths(self):
+        recipes = list(Recipe.objects.values_list('pk', flat=True)[:20])
+        if not recipes:
+            raise CommandError('Нет рецептов: запустите seed.')
+        prefixes = sorted({
+            name[:3] for name in Ingredient.objects.values_list(
+                'name', flat=True
+            )[:100]
+        })[:10]
+        return [
+            *(f'/api/recipes/?page={page}' for page in range(1, 6)),
+            *(f'/api/recipes/{pk}/' for pk in recipes),
+            *(f'/api/ingredients/?name={prefix}' for prefix in prefixes),
+            '/api/tags/',
+        ]
+
+    def get_headers(self, auth):
+        if not auth:
+            return {}
+        user = User.objects.filter(recipes__isnull=False).first()
+        token, _ = Token.objects.get_or_create(user=user)
+        return {'Authorization': f'Token {token.key}'}
+
+    def start_server(self, name, options):
+        args, env = SERVERS[name]
+        port = free_port()
+        command = [sys.executable] + [argument.format(
+            port=port, workers=options['workers'],
+            threads=options['wsgi_threads'],
+        ) for argument in args]
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env={**os.environ, **env},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'{name}: сервер не запустился '
+                                   f'({" ".join(command)}).')
+            try:
+                requests.get(f'{url}/api/tags/', timeout=1)
+                return process, url
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f'{name}: сервер не ответил за {READY_TIMEOUT} с.')
+
+    def run_level(self, url, paths, headers, concurrency, count):
+        local = threading.local()
+
+        def fetch(number):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            started = time.perf_counter()
+            try:
+                response = local.session.get(
+                    url + paths[number % len(paths)], headers=headers,
+                    timeout=30,
+                )
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        # Прогрев кэшей сервера и соединений клиентов.
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(fetch, range(len(paths))))
+            started = time.perf_counter()
+            results = list(pool.map(fetch, range(count)))
+            elapsed = time.perf_counter() - started
+        timings = [timing for timing, _ in results]
+        return {
+            'concurrency': concurrency,
+            'rps': round(count / elapsed, 1),
+            'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+            'mean_ms': round(statistics.mean(timings) * 1000, 2),
+            'errors': sum(not ok for _, ok in results),
+        }
+
+    def benchmark(self, name, url, paths, headers, options):
+        levels = []
+        for concurrency in options['levels']:
+            result = self.run_level(
+                url, paths, headers, concurrency, options['requests']
+            )
+            levels.append(result)
+            self.stdout.write(
+                f'{name:<10} x{concurrency:<4} {result["rps"]:8.1f} запр./с  '
+                f'p50 {result["p50_ms"]:8.2f} мс  '
+                f'p95 {result["p95_ms"]:8.2f} мс  '
+                f'ошибок {result["errors"]}'
+            )
+        return levels
+
+    def handle(self, *args, **options):
+        try:
+            options['levels'] = [
+                int(level) for level in options['concurrency'].split(',')
+            ]
+        except ValueError:
+            raise CommandError('--concurrency: числа через запятую.')
+        servers = [name for name in options['servers'].split(',') if name]
+        unknown = set(servers) - set(SERVERS)
+        if unknown and not options['url']:
+            raise CommandError(f'Неизвестные серверы: {", ".join(unknown)}.')
+        paths = self.get_paths()
+        headers = self.get_headers(options['auth'])
+        results = {}
+        if options['url']:
+            results['external'] = self.benchmark(
+                'external', options['url'].rstrip('/'), paths, headers,
+                options,
+            )
+        else:
+            for name in servers:
+                process, url = self.start_server(name, options)
+                try:
+                    results[name] = self.benchmark(
+                        name, url, paths, headers, options
+                    )
+                finally:
+                    process.terminate()
+                    process.wait()
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'requests': options['requests'],
+                'workers': options['workers'],
+                'wsgi_threads': options['wsgi_threads'],
+                'async_views_threads': settings.ASYNC_VIEWS_THREADS,
+                'auth': options['auth'],
+                'cache': settings.CACHES['default']['BACKEND'],
+            },
+            'results': results,
+        }
+        output = options['output'] or (
+            f'concurrency-{timezone.now():%Y%m%d-%H%M%S}.json'
+        )
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {output}'))
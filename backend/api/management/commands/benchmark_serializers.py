@@ -0,0 +1,86 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import prefetch_related_objects
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from api.fast_serializers import recipe_values, serialize_recipes
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeSerializer
+from recipes.models import Recipe, get_recipe_prefetches
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает RecipeSerializer с api.fast_serializers и '
+            'рендереры JSON на странице рецептов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', type=int, default=100,
+            help='Рецептов на странице.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз повторить каждый замер.'
+        )
+
+    def handle(self, *args, **options):
+        size, repeat = options['size'], options['repeat']
+        request = RequestFactory().get('/api/recipes/')
+        request.user = AnonymousUser()
+        queryset = Recipe.objects.select_related('author').with_user_flags(
+            request.user
+        ).order_by('-pub_date', '-id')
+        found = queryset.count()
+        if not found:
+            raise CommandError('В базе нет рецептов (см. seed).')
+        if found < size:
+            self.stdout.write(self.style.WARNING(
+                f'В базе только {found} рецептов из {size}.'
+            ))
+
+        def drf():
+            page = list(queryset[:size])
+            prefetch_related_objects(page, *get_recipe_prefetches())
+            return RecipeSerializer(
+                page, many=True, context={'request': request}
+            ).data
+
+        def fast():
+            return serialize_recipes(
+                list(recipe_values(queryset)[:size]), request
+            )
+
+        drf_data, fast_data = drf(), fast()
+        if json.loads(json.dumps(drf_data)) != json.loads(
+                json.dumps(fast_data)):
+            raise CommandError('Быстрый путь дал другой результат.')
+
+        self.measure('RecipeSerializer', drf, repeat)
+        self.measure('fast_serializers', fast, repeat)
+        self.measure('JSONRenderer',
+                     lambda: JSONRenderer().render(fast_data), repeat)
+        if orjson is None:
+            self.stdout.write('orjson не установлен, FastJSONRenderer '
+                              'работает как JSONRenderer.')
+        self.measure('FastJSONRenderer',
+                     lambda: FastJSONRenderer().render(fast_data), repeat)
+
+    def measure(self, name, func, repeat):
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'{name:<20} медиана {statistics.median(timings):8.2f} мс, '
+            f'мин {min(timings):8.2f} мс, '
+            f'запросов {len(queries) // repeat}'
+        )
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.autocomplete import memory_backend
+from api.query_budget import QueryBudgetExceeded, check_budget
+from recipes import reference
+from recipes.models import Ingredient, Recipe
+from users.models import Subscription
+
+
+class Command(BaseCommand):
+    help = ('Сверяет число SQL-запросов основных эндпоинтов с '
+            'query_budgets вьюсетов. Запускать на заполненной базе '
+            '(см. seed); кэши на время проверки пустые и свои.')
+
+    def get_checks(self, user, recipe, ingredient):
+        anonymous = ('гость', APIClient())
+        client = ('пользователь', APIClient())
+        client[1].force_authenticate(user)
+        prefix = ingredient.name[:2]
+        return (
+            (anonymous, '/api/recipes/'),
+            (anonymous, '/api/recipes/?limit=50'),
+            (anonymous, '/api/recipes/?pagination=cursor&limit=50'),
+            (anonymous, f'/api/recipes/{recipe.id}/'),
+            (anonymous, '/api/tags/'),
+            (anonymous, '/api/ingredients/'),
+            (anonymous, f'/api/ingredients/?name={prefix}'),
+            (client, '/api/recipes/?limit=50'),
+            (client, '/api/recipes/?is_favorited=1&limit=50'),
+            (client, '/api/recipes/?is_in_shopping_cart=1&limit=50'),
+            (client, f'/api/recipes/{recipe.id}/'),
+            (client, '/api/recipes/feed/?limit=50'),
+            (client, '/api/users/subscriptions/?limit=50'),
+        )
+
+    def handle(self, *args, **options):
+        recipe = Recipe.objects.select_related('author').first()
+        ingredient = Ingredient.objects.first()
+        if recipe is None or ingredient is None:
+            raise CommandError('В базе нет рецептов или ингредиентов.')
+        # Пользователь с подписками и избранным, чтобы страницы не пустели.
+        subscription = Subscription.objects.select_related('user').first()
+        user = subscription.user if subscription else recipe.author
+        failures = 0
+        for number, ((who, client), url) in enumerate(
+                self.get_checks(user, recipe, ingredient)):
+            cache = {'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'check-query-budgets-{number}',
+            }}
+            with override_settings(CACHES=cache,
+                                   ALLOWED_HOSTS=['testserver']):
+                reference.local_cache.clear()
+                memory_backend.reset()
+                try:
+                    response, count, budget = check_budget(client, url)
+                except QueryBudgetExceeded as exc:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'[{who}] {exc}'))
+                    continue
+            if response.status_code != 200:
+                failures += 1
+                self.stdout.write(self.style.ERROR(
+                    f'[{who}] GET {url}: статус {response.status_code}'
+                ))
+                continue
+            self.stdout.write(f'[{who}] GET {url}: {count} из {budget}')
+        if failures:
+            raise CommandError(f'Не прошли проверку: {failures}.')
+        self.stdout.write(self.style.SUCCESS('Бюджеты запросов соблюдены.'))
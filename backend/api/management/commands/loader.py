@@ -1,21 +1,128 @@
 import csv
+import io
+import json
+import os
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.autocomplete import invalidate_index
 from recipes.models import Ingredient
 
+DEFAULT_PATHS = {
+    'csv': 'data/ingredients.csv',
+    'json': 'data/ingredients.json',
+}
+
+
+def read_csv(file):
+    for row in csv.reader(file, delimiter=','):
+        if row:
+            name, unit = row
+            yield name.strip(), unit.strip()
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item['name'].strip(), item['measurement_unit'].strip()
+
+
+READERS = {'csv': read_csv, 'json': read_json}
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 
 class Command(BaseCommand):
-    help = 'Добавляет ингредиенты из сsv файла в базу данных.'
+    help = 'Добавляет ингредиенты из csv или json файла в базу данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Путь к файлу с ингредиентами.')
+        parser.add_argument(
+            '--format', choices=READERS, default=None,
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить существующие ингредиенты перед загрузкой.'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.'
+        )
 
     def handle(self, *args, **options):
-        with open(
-                'data/ingredients.csv',
-                'r', encoding='utf-8'
-        ) as file:
-            reader = csv.reader(file, delimiter=',')
-            Ingredient.objects.all().delete
-            for row in reader:
-                name, unit = row
-                Ingredient.objects.get_or_create(
-                    name=name, measurement_unit=unit)
-        self.stdout.write(self.style.SUCCESS('Done!'))
+        file_format = options['format']
+        path = options['path']
+        if path is None:
+            path = DEFAULT_PATHS[file_format or 'csv']
+        if file_format is None:
+            file_format = os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+
+        started = time.monotonic()
+        with open(path, 'r', encoding='utf-8') as file, transaction.atomic():
+            if options['clear']:
+                Ingredient.objects.all().delete()
+            before = Ingredient.objects.count()
+            rows = READERS[file_format](file)
+            if connection.vendor == 'postgresql' and not options['no_copy']:
+                processed = self._copy(rows)
+            else:
+                processed = self._bulk_create(rows, options['batch_size'])
+            created = Ingredient.objects.count() - before
+            invalidate_index()
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done! Прочитано {processed}, добавлено {created} '
+            f'за {elapsed:.2f} с ({processed / elapsed:.0f} строк/с).'
+        ))
+
+    def _bulk_create(self, rows, batch_size):
+        processed = 0
+        for batch in batches(rows, batch_size):
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=name, measurement_unit=unit)
+                 for name, unit in batch],
+                ignore_conflicts=True,
+            )
+            processed += len(batch)
+            self.stdout.write(f'Загружено строк: {processed}')
+        return processed
+
+    @staticmethod
+    def _copy(rows):
+        buffer = io.StringIO()
+        processed = 0
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(row)
+            processed += 1
+        buffer.seek(0)
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredient_load '
+                '(name varchar(200), measurement_unit varchar(20)) '
+                'ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredient_load FROM STDIN WITH (FORMAT csv)', buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit FROM ingredient_load '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+        return processed
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from api.metrics import BUCKETS, collect
+
+
+class Command(BaseCommand):
+    help = ('Сводка api.metrics по всем воркерам, выложенная ими '
+            'в общий кэш (REQUEST_METRICS=1).')
+
+    def handle(self, *args, **options):
+        views, workers = collect()
+        if not views:
+            self.stdout.write('Метрик нет: включите REQUEST_METRICS=1 и '
+                              'проверьте, что кэш общий для воркеров.')
+            return
+        self.stdout.write(f'Воркеров: {workers}')
+        labels = [f'≤{bound}' for bound in BUCKETS] + [f'>{BUCKETS[-1]}']
+        for key, stats in sorted(views.items(),
+                                 key=lambda item: -item[1]['total_ms']):
+            count = stats['count']
+            self.stdout.write(
+                f'{key}: {count} запр., '
+                f'среднее {stats["total_ms"] / count:.1f} мс, '
+                f'макс {stats["max_ms"]:.1f} мс, '
+                f'SQL {stats["queries"] / count:.1f} '
+                f'(макс {stats["max_queries"]}, '
+                f'{stats["sql_ms"] / count:.1f} мс), '
+                f'сериализация {stats["serializer_ms"] / count:.1f} мс, '
+                f'рендер {stats["render_ms"] / count:.1f} мс, '
+                f'сверх бюджета {stats["over_budget"]}'
+            )
+            self.stdout.write('    ' + ' '.join(
+                f'{label}мс:{amount}'
+                for label, amount in zip(labels, stats['buckets'])
+                if amount
+            ))
@@ -0,0 +1,250 @@
+"""Метрики запросов: число и время SQL, сериализация и рендеринг.
+
+Включаются через REQUEST_METRICS=1. RequestMetricsMiddleware отдаёт
+заголовок Server-Timing и копит гистограмму по view/action в памяти
+процесса. Раз в REQUEST_METRICS_PUBLISH_INTERVAL секунд воркер
+выкладывает её в общий кэш, откуда все воркеры собирает команда
+request_metrics; свежие данные процесса отдаёт /api/metrics/.
+
+execute_wrapper действует на соединение одного потока. Под ASGI SQL
+считается только у view из api.async_views, которые подключают счётчик
+в своём потоке через track_queries.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+PHASES = ('serializer', 'render')
+
+WORKERS_KEY = 'request_metrics:workers'
+WORKER_KEY = 'request_metrics:{}'
+PUBLISH_TIMEOUT = 24 * 60 * 60
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Метрики одного запроса; заодно execute_wrapper для SQL."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.phases = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+    def server_timing(self, total):
+        parts = [f'db;dur={self.sql_time * 1000:.1f};'
+                 f'desc="{self.queries} queries"']
+        parts += [f'{phase};dur={self.phases[phase] * 1000:.1f}'
+                  for phase in PHASES if phase in self.phases]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def is_active():
+    return _current.get() is not None
+
+
+@contextmanager
+def measure(phase):
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[phase] += time.perf_counter() - started
+
+
+@contextmanager
+def track_queries():
+    """Считает SQL текущего запроса на соединении этого потока."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    with connection.execute_wrapper(metrics):
+        yield
+
+
+def timed(phase, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with measure(phase):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def new_stats():
+    return {
+        'count': 0,
+        'buckets': [0] * (len(BUCKETS) + 1),
+        'total_ms': 0.0,
+        'max_ms': 0.0,
+        'queries': 0,
+        'max_queries': 0,
+        'over_budget': 0,
+        'sql_ms': 0.0,
+        **{f'{phase}_ms': 0.0 for phase in PHASES},
+    }
+
+
+def merge_stats(target, stats):
+    for name, value in stats.items():
+        if name == 'buckets':
+            target[name] = [a + b for a, b in zip(target[name], value)]
+        elif name.startswith('max_'):
+            target[name] = max(target[name], value)
+        else:
+            target[name] += value
+    return target
+
+
+class Histogram:
+    """Гистограмма длительности и суммы метрик по ключу view/action."""
+
+    def __init__(self):
+        self._views = defaultdict(new_stats)
+        self._lock = threading.Lock()
+        self._published = 0
+
+    def record(self, key, metrics, total, over_budget=False):
+        total_ms = total * 1000
+        bucket = next((position for position, bound in enumerate(BUCKETS)
+                       if total_ms <= bound), len(BUCKETS))
+        with self._lock:
+            stats = self._views[key]
+            stats['count'] += 1
+            stats['buckets'][bucket] += 1
+            stats['total_ms'] += total_ms
+            stats['max_ms'] = max(stats['max_ms'], total_ms)
+            stats['queries'] += metrics.queries
+            stats['max_queries'] = max(stats['max_queries'], metrics.queries)
+            stats['over_budget'] += over_budget
+            stats['sql_ms'] += metrics.sql_time * 1000
+            for phase in PHASES:
+                stats[f'{phase}_ms'] += metrics.phases[phase] * 1000
+
+    def snapshot(self):
+        with self._lock:
+            return {key: {**stats, 'buckets': list(stats['buckets'])}
+                    for key, stats in self._views.items()}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def publish(self, force=False):
+        """Выкладывает гистограмму процесса в общий кэш."""
+        now = time.monotonic()
+        if not force and (now - self._published
+                          < settings.REQUEST_METRICS_PUBLISH_INTERVAL):
+            return
+        self._published = now
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        cache.set(WORKER_KEY.format(worker), self.snapshot(),
+                  PUBLISH_TIMEOUT)
+        workers = cache.get(WORKERS_KEY) or []
+        if worker not in workers:
+            cache.set(WORKERS_KEY, [*workers, worker], PUBLISH_TIMEOUT)
+
+
+histogram = Histogram()
+
+
+def collect():
+    """Гистограммы всех воркеров из общего кэша, сложенные по ключам."""
+    workers = cache.get(WORKERS_KEY) or []
+    merged = defaultdict(new_stats)
+    published = cache.get_many([WORKER_KEY.format(name) for name in workers])
+    for snapshot in published.values():
+        for key, stats in snapshot.items():
+            merge_stats(merged[key], stats)
+    return dict(merged), len(published)
+
+
+def resolve_view(request):
+    """Ключ view/action и бюджет запросов из query_budgets вьюсета."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved', None
+    view = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    if view is None or action is None:
+        return match.view_name or match._func_path, None
+    budget = getattr(view, 'query_budgets', {}).get(action)
+    return f'{view.__name__}.{action}', budget
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Под ASGI не занимает поток на время всего запроса.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with track_queries():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return await sync_to_async(self.finish)(
+            request, response, metrics, started
+        )
+
+    def finish(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        key, budget = resolve_view(request)
+        over_budget = budget is not None and metrics.queries > budget
+        if over_budget:
+            logger.warning('%s: %s SQL-запросов при бюджете %s (%s)',
+                           key, metrics.queries, budget,
+                           request.get_full_path())
+        response['Server-Timing'] = metrics.server_timing(total)
+        histogram.record(key, metrics, total, over_budget)
+        histogram.publish()
+        return response
@@ -0,0 +1,49 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from api import metrics
+from recipes.reference import get_reference
+
+
+class ReferenceCacheMixin:
+    """list и retrieve справочника из recipes.reference, без запросов."""
+    reference = None
+
+    def list(self, request, *args, **kwargs):
+        return Response(list(get_reference(self.reference).values()))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            item = get_reference(self.reference).get(int(lookup))
+        except ValueError:
+            item = None
+        if item is None:
+            raise NotFound()
+        return Response(item)
+
+
+class MetricsMixin:
+    """Время сериализации и рендеринга для api.metrics.
+
+    query_budgets — {action: число SQL-запросов}; превышение пишется
+    в лог и в гистограмму, его же проверяет check_query_budgets.
+    """
+    query_budgets = {}
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if metrics.is_active():
+            serializer.to_representation = metrics.timed(
+                'serializer', serializer.to_representation
+            )
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        renderer = getattr(response, 'accepted_renderer', None)
+        if renderer is not None and metrics.is_active():
+            renderer.render = metrics.timed('render', renderer.render)
+        return response
@@ -1,6 +1,163 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.feed import get_feed
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class ApproximateCountPaginator(Paginator):
+    """Для таблиц без фильтров берёт оценку из pg_class.reltuples."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if (connection.vendor == 'postgresql'
+                and hasattr(queryset, 'query')
+                and not queryset.query.where
+                and not queryset.query.distinct):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    (queryset.model._meta.db_table,)
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= settings.APPROXIMATE_COUNT_THRESHOLD:
+                return int(row[0])
+        return super().count
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по (-pub_date, -id) без OFFSET и COUNT(*)."""
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    page_size_query_param = 'limit'
+    page_size = 6
+    max_page_size = 100
+    invalid_cursor_message = 'Неверный курсор.'
+
+    @classmethod
+    def is_requested(cls, request):
+        return (cls.cursor_query_param in request.query_params
+                or request.query_params.get(cls.mode_query_param)
+                == 'cursor')
+
+    @staticmethod
+    def supports(queryset):
+        """Курсор знает только порядок по умолчанию (-pub_date, -id)."""
+        return not queryset.query.order_by
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, obj):
+        if isinstance(obj, dict):
+            # Строка .values() из api.fast_serializers.
+            pub_date, pk = obj['pub_date'], obj['id']
+        else:
+            pub_date, pk = obj.pub_date, obj.pk
+        position = f'{pub_date.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, pk = base64.urlsafe_b64decode(
+                encoded.encode()
+            ).decode().split('|')
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (binascii.Error, TypeError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
+
+    def get_page_queryset(self, queryset, request):
+        """Срез страницы с условием курсора и одной лишней строкой."""
+        queryset = queryset.order_by('-pub_date', '-pk')
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            pub_date, pk = cursor
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        return queryset[:self.get_page_size(request) + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        page = list(self.get_page_queryset(queryset, request))
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.last)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class FeedPagination(KeysetPagination):
+    """Курсор по записям ленты подписок, см. recipes.feed."""
+
+    def get_page_queryset(self, queryset, request):
+        return get_feed(
+            queryset, request.user, self.decode_cursor(request),
+            self.get_page_size(request) + 1,
+        )
+
+
+class RecipePagination(LimitPageNumberPagination):
+    """Страницы по номеру по умолчанию, курсор по ?pagination=cursor.
+
+    При другой сортировке (?ordering=, релевантность поиска) курсор
+    не применяется и отдаются обычные страницы.
+    """
+    django_paginator_class = ApproximateCountPaginator
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (KeysetPagination.is_requested(request)
+                and KeysetPagination.supports(queryset)):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,53 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import JSONParser, MultiPartParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Слишком большой запрос.'
+    default_code = 'request_too_large'
+
+
+class FastJSONParser(JSONParser):
+    """Разбор JSON через orjson для тел в UTF-8, иначе как в DRF."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET
+        )
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class SizeLimitedParserMixin:
+    """Отклоняет тело больше RECIPE_MAX_REQUEST_SIZE до разбора."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = (parser_context or {}).get('request')
+        if request is not None:
+            try:
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            if length > settings.RECIPE_MAX_REQUEST_SIZE:
+                raise RequestTooLarge()
+        return super().parse(stream, media_type, parser_context)
+
+
+class SizeLimitedJSONParser(SizeLimitedParserMixin, FastJSONParser):
+    pass
+
+
+class SizeLimitedMultiPartParser(SizeLimitedParserMixin, MultiPartParser):
+    pass
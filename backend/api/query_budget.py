@@ -0,0 +1,54 @@
+"""Проверка бюджетов SQL-запросов эндпоинтов.
+
+Бюджет объявляется у вьюсета: query_budgets = {'list': 5}. Хелперы
+подходят и для тестов, и для команды check_query_budgets:
+
+    with assert_max_queries(5):
+        client.get('/api/recipes/')
+
+    check_budget(client, '/api/recipes/?limit=50')
+"""
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(budget, label='блок'):
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    if len(context) > budget:
+        queries = '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(context.captured_queries, 1)
+        )
+        raise QueryBudgetExceeded(
+            f'{label}: {len(context)} SQL-запросов при бюджете {budget}\n'
+            f'{queries}'
+        )
+
+
+def get_budget(url, method='get'):
+    func = resolve(urlsplit(url).path).func
+    action = (getattr(func, 'actions', None) or {}).get(method)
+    budget = getattr(getattr(func, 'cls', None), 'query_budgets', {}).get(
+        action
+    )
+    if budget is None:
+        raise LookupError(f'Для {method.upper()} {url} не объявлен бюджет.')
+    return budget
+
+
+def check_budget(client, url, method='get', **kwargs):
+    """Запрос через тестовый клиент; падает, если бюджет превышен."""
+    budget = get_budget(url, method)
+    with assert_max_queries(budget, f'{method.upper()} {url}') as context:
+        response = getattr(client, method)(url, **kwargs)
+    return response, len(context), budget
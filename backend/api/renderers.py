@@ -0,0 +1,63 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON через orjson, если он установлен, иначе как в DRF.
+
+    Даты отдаются в encoder DRF, чтобы формат не отличался; отступы
+    (Accept: application/json; indent=4) orjson не умеет, их рисует DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(
+                accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            return orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Например, ключи-числа в ошибках ListField: их DRF приводит
+            # к строкам.
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Выбор формата списка покупок через ?format= или Accept.
+
+    Сам файл отдаётся потоком из api.utils, минуя рендерер. Через него
+    проходят только ответы с ошибками (401, 404 и т.п.), они отдаются
+    JSON-ом.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = FastJSONRenderer.media_type
+        return FastJSONRenderer().render(data)
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class ShoppingListTXTRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
@@ -0,0 +1,100 @@
+"""Кэш ответов списка и карточки рецептов.
+
+Общая часть ответа (как для гостя) кэшируется по адресу запроса и
+версиям затронутых областей из recipes.versions: тегов и автора из
+фильтра, отдельного рецепта или всей ленты. Флаги is_favorited,
+is_in_shopping_cart и is_subscribed накладываются поверх неё для
+каждого пользователя одним запросом.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Recipe
+from recipes.reference import get_reference
+from recipes.versions import (
+    ALL_RECIPES, AUTHOR_SCOPE, INGREDIENTS, RECIPE_SCOPE, SCORES, TAG_SCOPE,
+    TAGS, get_scope_versions, get_version,
+)
+
+LIST_KEY = 'recipes_response:list:{}'
+DETAIL_KEY = 'recipes_response:detail:{}'
+
+USER_FILTERS = ('is_favorited', 'is_in_shopping_cart')
+SCORE_ORDERINGS = ('popular', 'trending')
+
+
+def is_cacheable(request):
+    """Фильтры по избранному и корзине у каждого пользователя свои."""
+    return request.user.is_anonymous or not any(
+        request.query_params.get(name) for name in USER_FILTERS
+    )
+
+
+def list_scopes(params):
+    # Неизвестные теги и авторы в ключ не попадают: такие запросы либо
+    # падают на валидации фильтра, либо живут в области ALL_RECIPES.
+    tags = {tag['slug'] for tag in get_reference(TAGS).values()}
+    scopes = [TAG_SCOPE.format(slug)
+              for slug in params.getlist('tags') if slug in tags]
+    author = params.get('author', '')
+    if author.isdigit():
+        scopes.append(AUTHOR_SCOPE.format(int(author)))
+    if not scopes:
+        scopes.append(ALL_RECIPES)
+    if params.get('ordering') in SCORE_ORDERINGS:
+        scopes.append(SCORES)
+    return scopes
+
+
+def make_key(template, request, scopes):
+    versions = (
+        get_scope_versions(scopes),
+        get_version(TAGS), get_version(INGREDIENTS),
+    )
+    digest = hashlib.md5(repr((
+        request.build_absolute_uri(), request.accepted_media_type, versions
+    )).encode()).hexdigest()
+    return template.format(digest)
+
+
+def list_key(request):
+    return make_key(LIST_KEY, request, list_scopes(request.query_params))
+
+
+def detail_key(request, pk):
+    return make_key(DETAIL_KEY, request, [RECIPE_SCOPE.format(pk)])
+
+
+def get_or_set(key, render):
+    payload = cache.get(key)
+    if payload is None:
+        payload = render()
+        cache.set(key, payload, settings.RECIPE_RESPONSE_CACHE_TIMEOUT)
+    return payload
+
+
+def with_user_flags(user, items):
+    """Копии рецептов с флагами пользователя и сами флаги (для ETag)."""
+    if user.is_anonymous or not items:
+        return items, ()
+    flags = {
+        pk: rest for pk, *rest in Recipe.objects.filter(
+            pk__in=[item['id'] for item in items]
+        ).with_user_flags(user).values_list(
+            'id', 'is_favorited', 'is_in_shopping_cart', 'is_subscribed'
+        )
+    }
+    merged = []
+    for item in items:
+        favorited, in_cart, subscribed = flags.get(
+            item['id'], (False, False, False)
+        )
+        merged.append({
+            **item,
+            'author': {**item['author'], 'is_subscribed': subscribed},
+            'is_favorited': favorited,
+            'is_in_shopping_cart': in_cart,
+        })
+    return merged, sorted(flags.items())
@@ -1,13 +1,25 @@
+import json
+import math
+
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import QueryDict
 from django.shortcuts import get_object_or_404
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 
+from api.cache import invalidate_recipe_shopping_lists
+from api.fields import SpooledBase64ImageField
+from api.signals import bookkeeping_muted
+from recipes import reference
+from recipes.images import schedule_variants, variant_urls
 from recipes.models import (
-    Favorite, Ingredient, IngredientAmount, Recipe, Shopping, Tag,
+    Favorite, Ingredient, IngredientAmount, Recipe, Shopping,
+    ShoppingListItem, Tag, get_recipe_prefetches,
 )
 from users.models import Subscription, User
 
@@ -43,6 +55,8 @@ class CustomUserSerializer(UserSerializer):
         user = self.context.get('request').user
         if isinstance(user, AnonymousUser):
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return Subscription.objects.filter(user=user, author=obj).exists()
 
 
@@ -51,6 +65,14 @@ class SetPasswordSerializer(serializers.Serializer):
     current_password = serializers.CharField(write_only=True)
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_RECIPES_LIMIT,
+    )
+
+
 class IngredientAmountSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='ingredient.id')
     name = serializers.ReadOnlyField(source='ingredient.name')
@@ -80,43 +102,67 @@ class RecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientAmountSerializer(source='ingredientamount_set',
                                              many=True,
                                              read_only=True)
-    tags = TagSerializer(read_only=True, many=True)
+    tags = serializers.SerializerMethodField()
     author = CustomUserSerializer(read_only=True)
-    image = Base64ImageField()
+    image = SpooledBase64ImageField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'author', 'text',
                   'tags', 'ingredients', 'cooking_time',
-                  'image', 'is_in_shopping_cart', 'is_favorited')
+                  'image', 'image_variants',
+                  'is_in_shopping_cart', 'is_favorited')
 
-    def validate(self, data):
+    def _get_tags_and_ingredients(self):
         ingredients = self.initial_data.get('ingredients')
-        tags = self.initial_data.get('tags')
+        if not isinstance(self.initial_data, QueryDict):
+            return self.initial_data.get('tags'), ingredients
+        # multipart: теги списком, ингредиенты JSON-строкой.
+        try:
+            ingredients = json.loads(ingredients or '[]')
+        except ValueError:
+            ingredients = None
+        return self.initial_data.getlist('tags'), ingredients
+
+    def validate(self, data):
+        tags, ingredients = self._get_tags_and_ingredients()
         if not tags:
             raise serializers.ValidationError({
                 'tags': 'Нужно выбрать хотя бы 1 тег'})
         if not ingredients:
             raise serializers.ValidationError({
                 'ingredients': 'Нужно выбрать хотя бы 1 ингредиент'})
-        ingredient_list = []
-        for ingredient_item in ingredients:
-            ingredient = get_object_or_404(Ingredient,
-                                           id=ingredient_item.get('id'))
-            if ingredient in ingredient_list:
-                raise serializers.ValidationError(
-                    'Ингредиент уже был добавлен')
-            ingredient_list.append(ingredient)
-            if int(float(ingredient_item['amount'])) < 0:
-                raise serializers.ValidationError({
-                    'ingredients': 'Укажите количество'
-                })
-        data['ingredients'] = ingredients
+        amounts = {}
+        try:
+            for ingredient_item in ingredients:
+                if not isinstance(ingredient_item, dict):
+                    raise serializers.ValidationError({
+                        'ingredients': 'Укажите ингредиент и количество'
+                    })
+                ingredient_id = int(ingredient_item.get('id'))
+                if ingredient_id in amounts:
+                    raise serializers.ValidationError(
+                        'Ингредиент уже был добавлен')
+                amounts[ingredient_id] = float(ingredient_item['amount'])
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError({
+                'ingredients': 'Укажите ингредиент и количество'
+            })
+        if any(not math.isfinite(amount) or amount <= 0
+               for amount in amounts.values()):
+            raise serializers.ValidationError({
+                'ingredients': 'Укажите количество'
+            })
+        if len(Ingredient.objects.in_bulk(list(amounts))) != len(amounts):
+            raise NotFound('Ингредиент не найден.')
+        data['ingredients'] = amounts
         data['tags'] = tags
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
@@ -124,9 +170,15 @@ class RecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=request.user,
                                        **validated_data)
         recipe.tags.set(tags_data)
-        self._add_ingredients(recipe, ingredients_data)
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=recipe, ingredient_id=ingredient_id,
+                             amount=amount)
+            for ingredient_id, amount in ingredients_data.items()
+        )
+        schedule_variants(recipe.id)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
@@ -136,21 +188,50 @@ class RecipeSerializer(serializers.ModelSerializer):
         instance.cooking_time = validated_data.get(
             'cooking_time', instance.cooking_time
         )
-        instance.tags.clear()
         instance.tags.set(tags_data)
-        IngredientAmount.objects.filter(recipe=instance).delete()
-        self._add_ingredients(instance, ingredients)
+        with bookkeeping_muted():
+            deltas = self._update_ingredients(instance, ingredients)
+        ShoppingListItem.objects.apply_delta(
+            Shopping.objects.filter(recipe=instance).values_list(
+                'user_id', flat=True),
+            deltas,
+        )
+        invalidate_recipe_shopping_lists(recipe=instance)
         instance.save()
+        if 'image' in validated_data:
+            schedule_variants(instance.id)
         return instance
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_subscribed'):
+            instance.author.is_subscribed = instance.is_subscribed
+        if 'ingredients' in self.fields and (
+                'ingredientamount_set' not in getattr(
+                    instance, '_prefetched_objects_cache', ())):
+            prefetch_related_objects([instance], *get_recipe_prefetches())
+        return super().to_representation(instance)
+
+    def get_tags(self, obj):
+        # Теги берутся из кэша справочника, из базы — только их id.
+        return reference.get_tags(
+            tag_recipe.tag_id for tag_recipe in obj.recipes_tag.all()
+        )
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         user = request.user
         if isinstance(user, AnonymousUser):
             return False
         return Favorite.objects.filter(user=user, recipe=obj).exists()
 
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image_variants, self.context.get('request'))
+
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         user = request.user
         if isinstance(user, AnonymousUser):
@@ -158,26 +239,44 @@ class RecipeSerializer(serializers.ModelSerializer):
         return Shopping.objects.filter(user=user, recipe=obj).exists()
 
     @staticmethod
-    def _add_ingredients(recipe, ingredients):
-        instances = []
-        for ingredient in ingredients:
-            obj = get_object_or_404(Ingredient,
-                                    pk=ingredient.get('id')
-                                    )
-            instances.append(IngredientAmount(
-                recipe=recipe,
-                ingredient=obj,
-                amount=ingredient.get('amount')
-            ))
-        IngredientAmount.objects.bulk_create(instances)
+    def _update_ingredients(recipe, amounts):
+        """Применяет разницу в ингредиентах, возвращает дельты количеств."""
+        existing = {
+            item.ingredient_id: item
+            for item in IngredientAmount.objects.filter(recipe=recipe)
+        }
+        deltas = {}
+        changed = []
+        for ingredient_id, item in existing.items():
+            amount = amounts.get(ingredient_id, 0)
+            if amount != item.amount:
+                deltas[ingredient_id] = amount - item.amount
+                item.amount = amount
+                changed.append(item)
+        IngredientAmount.objects.filter(
+            recipe=recipe, ingredient__in=existing.keys() - amounts.keys()
+        ).delete()
+        IngredientAmount.objects.bulk_update(
+            [item for item in changed if item.ingredient_id in amounts],
+            ['amount'],
+        )
+        new = amounts.keys() - existing.keys()
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=recipe, ingredient_id=ingredient_id,
+                             amount=amounts[ingredient_id])
+            for ingredient_id in new
+        )
+        deltas.update((ingredient_id, amounts[ingredient_id])
+                      for ingredient_id in new)
+        return deltas
 
 
 class ShortRecipeSerializer(RecipeSerializer):
-    image = Base64ImageField()
+    image = SpooledBase64ImageField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
 
 
@@ -204,20 +303,24 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_is_subscribed(obj):
-        return Subscription.objects.filter(
-            user=obj.user, author=obj.author
-        ).exists()
+        return True
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        queryset = Recipe.objects.filter(author=obj.author)
-        if limit:
-            queryset = queryset[:int(limit)]
+        previews = self.context.get('recipes')
+        if previews is not None:
+            queryset = previews.get(obj.author_id, [])
+        else:
+            request = self.context.get('request')
+            limit = request.GET.get('recipes_limit')
+            queryset = Recipe.objects.filter(author=obj.author)
+            if limit:
+                queryset = queryset[:int(limit)]
         return ShortRecipeSerializer(queryset, many=True).data
 
     @staticmethod
     def get_recipes_count(obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return Recipe.objects.filter(author=obj.author).count()
 
 
@@ -0,0 +1,250 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens
+from api.autocomplete import invalidate_index
+from api.cache import (
+    invalidate_recipe_shopping_lists, invalidate_shopping_list,
+)
+from recipes import reference
+from recipes.feed import fan_out_recipe
+from recipes.models import (
+    Favorite, Ingredient, IngredientAmount, Recipe, Shopping,
+    ShoppingListItem, Tag, TagRecipe,
+)
+from recipes.search import remove_from_search_index, schedule_search_index
+from recipes.versions import (
+    TAG_SCOPE, TAGS, bump_recipes, bump_scopes, bump_version, recipe_scopes,
+)
+from users.models import AuthorStats, Subscription, User
+
+_muted = threading.local()
+
+
+@contextmanager
+def bookkeeping_muted():
+    """Отключает построчные обработчики учёта: вызывающий код сам
+    обновляет списки покупок, счётчики и кэши одним проходом."""
+    _muted.depth = getattr(_muted, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _muted.depth -= 1
+
+
+def is_muted():
+    return getattr(_muted, 'depth', 0) > 0
+
+
+@receiver(post_save, sender=Shopping)
+def shopping_added(sender, instance, created, **kwargs):
+    if is_muted():
+        return
+    if created:
+        ShoppingListItem.objects.add_recipe(
+            [instance.user_id], instance.recipe_id
+        )
+        Recipe.objects.filter(pk=instance.recipe_id).increment(
+            'shopping_count'
+        )
+    invalidate_shopping_list(instance.user_id)
+
+
+@receiver(pre_delete, sender=Shopping)
+def shopping_removed(sender, instance, **kwargs):
+    if is_muted():
+        return
+    # pre_delete: при каскадном удалении рецепта его IngredientAmount
+    # ещё на месте и можно вычесть количества.
+    ShoppingListItem.objects.remove_recipe(
+        [instance.user_id], instance.recipe_id
+    )
+    Recipe.objects.filter(pk=instance.recipe_id).increment(
+        'shopping_count', -1
+    )
+    invalidate_shopping_list(instance.user_id)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    if is_muted():
+        return
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).increment(
+            'favorites_count'
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(sender, instance, **kwargs):
+    if is_muted():
+        return
+    Recipe.objects.filter(pk=instance.recipe_id).increment(
+        'favorites_count', -1
+    )
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_added(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.increment(instance.author_id, 'subscribers_count')
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_removed(sender, instance, **kwargs):
+    AuthorStats.increment(instance.author_id, 'subscribers_count', -1)
+
+
+def _deleting_recipes():
+    if not hasattr(_muted, 'deleting_recipes'):
+        _muted.deleting_recipes = set()
+    return _muted.deleting_recipes
+
+
+@receiver(pre_save, sender=IngredientAmount)
+def ingredient_amount_saving(sender, instance, raw, **kwargs):
+    if raw or is_muted() or instance.pk is None:
+        return
+    instance._saved_amount = IngredientAmount.objects.filter(
+        pk=instance.pk
+    ).values_list('ingredient_id', 'amount').first()
+
+
+def apply_recipe_delta(recipe_id, deltas):
+    ShoppingListItem.objects.apply_delta(
+        Shopping.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True),
+        deltas,
+    )
+
+
+@receiver(post_save, sender=IngredientAmount)
+def ingredient_amount_saved(sender, instance, raw, **kwargs):
+    if raw or is_muted():
+        return
+    deltas = {instance.ingredient_id: instance.amount}
+    saved = getattr(instance, '_saved_amount', None)
+    if saved:
+        ingredient_id, amount = saved
+        deltas[ingredient_id] = deltas.get(ingredient_id, 0) - amount
+    apply_recipe_delta(instance.recipe_id, deltas)
+
+
+@receiver(post_delete, sender=IngredientAmount)
+def ingredient_amount_deleted(sender, instance, **kwargs):
+    # При удалении рецепта его количества вычитает shopping_removed.
+    if is_muted() or instance.recipe_id in _deleting_recipes():
+        return
+    apply_recipe_delta(
+        instance.recipe_id, {instance.ingredient_id: -instance.amount}
+    )
+
+
+@receiver((post_save, post_delete), sender=IngredientAmount)
+def ingredient_amount_changed(sender, instance, **kwargs):
+    if is_muted():
+        return
+    invalidate_recipe_shopping_lists(recipe_id=instance.recipe_id)
+    bump_recipes(Recipe.objects.filter(pk=instance.recipe_id))
+    schedule_search_index(instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    invalidate_index()
+    if not created:
+        invalidate_recipe_shopping_lists(recipe__ingredients=instance)
+        schedule_search_index(*instance.recipes.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.increment(instance.author_id, 'recipes_count')
+        fan_out_recipe(instance)
+        # Теги нового рецепта сбрасываются в recipe_tags_changed.
+        bump_scopes(*recipe_scopes([instance.id], [instance.author_id]))
+    else:
+        bump_recipes(Recipe.objects.filter(pk=instance.pk))
+    schedule_search_index(instance.id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    _deleting_recipes().add(instance.pk)
+    bump_recipes(Recipe.objects.filter(pk=instance.pk))
+
+
+def bump_tag_scopes(tag_ids):
+    bump_scopes(*(TAG_SCOPE.format(tag['slug'])
+                  for tag in reference.get_tags(tag_ids)))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        bump_scopes(TAG_SCOPE.format(instance.slug))
+        bump_recipes(Recipe.objects.filter(
+            pk__in=pk_set) if pk_set else instance.recipes.all())
+        return
+    if action == 'pre_clear':
+        pk_set = instance.tags.values_list('pk', flat=True)
+    bump_tag_scopes(pk_set)
+
+
+@receiver((post_save, post_delete), sender=TagRecipe)
+def tag_recipe_changed(sender, instance, **kwargs):
+    # Сохранение через инлайн админки идёт мимо m2m_changed.
+    bump_tag_scopes([instance.tag_id])
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields, **kwargs):
+    # Вход в систему обновляет только last_login — ответы не меняются.
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    bump_recipes(Recipe.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=User)
+def user_credentials_changed(sender, instance, created, update_fields,
+                             **kwargs):
+    # Смена пароля, деактивация и правка профиля: кэш токенов хранит
+    # пользователя целиком.
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_tokens(*Token.objects.filter(
+        user=instance
+    ).values_list('key', flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    _deleting_recipes().discard(instance.id)
+    remove_from_search_index(instance.id)
+    AuthorStats.increment(instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    invalidate_index()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    bump_version(TAGS)
+    reference.invalidate(TAGS)
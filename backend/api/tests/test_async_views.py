@@ -0,0 +1,61 @@
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import include, path, resolve
+
+from api.async_views import async_routes
+from api.urls import router
+from api.views import IngredientViewSet, RecipeViewSet, TagViewSet
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_tag, create_user,
+)
+
+urlpatterns = [
+    path('api/', include([
+        *async_routes('recipes', RecipeViewSet),
+        *async_routes('ingredients', IngredientViewSet),
+        *async_routes('tags', TagViewSet),
+        path('', include(router.urls)),
+    ])),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTests(TransactionTestCase):
+    def setUp(self):
+        clear_caches()
+        self.tag = create_tag()
+        self.recipe = create_recipe(
+            create_user(), tags=[self.tag],
+            ingredients=[(create_ingredient(name='Соль'), 5)],
+        )
+
+    def get(self, url, **params):
+        response = async_to_sync(AsyncClient().get)(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_hot_endpoints(self):
+        self.assertEqual(
+            self.get('/api/recipes/')['results'][0]['id'], self.recipe.id
+        )
+        self.assertEqual(
+            self.get(f'/api/recipes/{self.recipe.id}/')['tags'][0]['slug'],
+            self.tag.slug,
+        )
+        self.assertEqual(self.get('/api/tags/')[0]['id'], self.tag.id)
+        self.assertEqual(
+            self.get('/api/ingredients/', name='сол')[0]['name'], 'Соль'
+        )
+
+    def test_list_actions_stay_with_router(self):
+        for url in ('/api/recipes/feed/',
+                    '/api/recipes/download_shopping_cart/',
+                    '/api/recipes/shopping_cart/'):
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    resolve(url).func.__name__, 'async_view'
+                )
+        self.assertEqual(
+            resolve(f'/api/recipes/{self.recipe.id}/').func.__name__,
+            'async_view',
+        )
@@ -0,0 +1,65 @@
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes.tests.factories import clear_caches, create_user
+
+
+class CachingTokenAuthenticationTests(APITestCase):
+    url = '/api/users/me/'
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_me(self):
+        return self.client.get(self.url)
+
+    def test_warm_token_skips_lookup(self):
+        self.client.get('/api/tags/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_password_is_loaded_from_database(self):
+        self.get_me()
+
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': 'Password-123',
+            'new_password': 'Another-Password-456',
+        })
+
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('Another-Password-456'))
+
+    def test_logout_invalidates_token(self):
+        self.get_me()
+
+        response = self.client.post('/api/auth/token/logout/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_deactivation_invalidates_token(self):
+        self.get_me()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_profile_change_is_visible(self):
+        self.get_me()
+
+        self.user.first_name = 'Новое'
+        self.user.save()
+
+        self.assertEqual(self.get_me().data['first_name'], 'Новое')
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token 0000')
+
+        self.assertEqual(self.get_me().status_code, 401)
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.autocomplete import PrefixIndex, autocomplete, warm_up
+from recipes.tests.factories import clear_caches, create_ingredient
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex(
+            (pk, name, 'г') for pk, name in enumerate((
+                'Соль морская', 'Морковь', 'Капуста морская', 'Сахар',
+                'Морс',
+            ))
+        )
+
+    def search(self, query, limit=10):
+        return [item['name'] for item in self.index.search(query, limit)]
+
+    def test_name_prefix_then_word_prefix(self):
+        self.assertEqual(self.search('мор'), [
+            'Морковь', 'Морс', 'Соль морская', 'Капуста морская',
+        ])
+
+    def test_substring_fallback_and_limit(self):
+        self.assertEqual(self.search('ахар'), ['Сахар'])
+        self.assertEqual(self.search('мор', limit=1), ['Морковь'])
+
+
+class IngredientAutocompleteTests(APITestCase):
+    url = '/api/ingredients/'
+
+    def setUp(self):
+        clear_caches()
+        self.flour = create_ingredient(name='Мука пшеничная')
+
+    def search(self, query):
+        response = self.client.get(self.url, {'name': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.data]
+
+    def test_warm_up_builds_index(self):
+        warm_up()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(autocomplete('мук'), [{
+                'id': self.flour.id, 'name': 'Мука пшеничная',
+                'measurement_unit': self.flour.measurement_unit,
+            }])
+        self.assertEqual(len(queries), 0)
+
+    def test_endpoint(self):
+        self.assertEqual(self.search('МУК'), ['Мука пшеничная'])
+        self.assertEqual(self.search('  '), [])
+
+    @override_settings(INGREDIENT_INDEX_CHECK_INTERVAL=3600)
+    def test_ingredient_changes_rebuild_index(self):
+        self.search('мук')
+        flour = create_ingredient(name='Мука ржаная')
+        self.assertEqual(self.search('мука р'), ['Мука ржаная'])
+
+        flour.name = 'Мускат'
+        flour.save()
+        self.assertEqual(self.search('мус'), ['Мускат'])
+
+        flour.delete()
+        self.assertEqual(self.search('мус'), [])
+
+    def test_limit(self):
+        for number in range(3):
+            create_ingredient(name=f'Мука {number}')
+
+        self.assertEqual(len(autocomplete('мука', limit=2)), 2)
@@ -0,0 +1,124 @@
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from api.bulk import lock_user
+from recipes.models import Favorite, Recipe, Shopping, ShoppingListItem
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_user,
+)
+
+
+class BulkEndpointTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.flour = create_ingredient()
+        self.first, self.second = (
+            create_recipe(create_user(), ingredients=((self.flour, 100),))
+            for _ in range(2)
+        )
+        self.missing = self.second.id + 100
+
+    def send(self, method, url, recipe_ids):
+        response = getattr(self.client, method)(
+            f'/api/recipes/{url}/', {'recipes': recipe_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item['status'] for item in response.data}
+
+    def get_counts(self, recipe, field):
+        return Recipe.objects.values_list(field, flat=True).get(pk=recipe.pk)
+
+    def get_total(self):
+        return ShoppingListItem.objects.filter(
+            user=self.user, ingredient=self.flour
+        ).values_list('total_amount', flat=True).first()
+
+    def test_add_to_cart_reports_each_recipe(self):
+        Shopping.objects.create(user=self.user, recipe=self.first)
+
+        statuses = self.send('post', 'shopping_cart', [
+            self.first.id, self.second.id, self.missing,
+        ])
+
+        self.assertEqual(statuses, {
+            self.first.id: 'already_added',
+            self.second.id: 'added',
+            self.missing: 'not_found',
+        })
+        self.assertEqual(self.get_counts(self.first, 'shopping_count'), 1)
+        self.assertEqual(self.get_counts(self.second, 'shopping_count'), 1)
+        self.assertEqual(self.get_total(), 200)
+
+    def test_remove_from_cart_reports_each_recipe(self):
+        for recipe in (self.first, self.second):
+            Shopping.objects.create(user=self.user, recipe=recipe)
+        self.send('delete', 'shopping_cart', [self.second.id])
+
+        statuses = self.send('delete', 'shopping_cart', [
+            self.first.id, self.second.id, self.missing,
+        ])
+
+        self.assertEqual(statuses, {
+            self.first.id: 'removed',
+            self.second.id: 'not_added',
+            self.missing: 'not_found',
+        })
+        self.assertFalse(Shopping.objects.filter(user=self.user).exists())
+        self.assertEqual(self.get_counts(self.first, 'shopping_count'), 0)
+        self.assertEqual(self.get_counts(self.second, 'shopping_count'), 0)
+        self.assertIsNone(self.get_total())
+
+    def test_favorite_add_and_remove(self):
+        statuses = self.send('post', 'favorite', [self.first.id])
+        self.assertEqual(statuses, {self.first.id: 'added'})
+        self.assertEqual(self.get_counts(self.first, 'favorites_count'), 1)
+
+        statuses = self.send('delete', 'favorite', [
+            self.first.id, self.second.id,
+        ])
+
+        self.assertEqual(statuses, {
+            self.first.id: 'removed', self.second.id: 'not_added',
+        })
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+        self.assertEqual(self.get_counts(self.first, 'favorites_count'), 0)
+
+    def test_clear_cart(self):
+        for recipe in (self.first, self.second):
+            Shopping.objects.create(user=self.user, recipe=recipe)
+
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Shopping.objects.filter(user=self.user).exists())
+        self.assertEqual(self.get_counts(self.first, 'shopping_count'), 0)
+        self.assertIsNone(self.get_total())
+
+    def test_invalid_payload(self):
+        response = self.client.post(
+            '/api/recipes/shopping_cart/', {'recipes': []}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_recipe_endpoints_take_user_lock(self):
+        # Иначе одиночная вставка между find_recipes и bulk_create
+        # пакета учла бы рецепт дважды.
+        url = f'/api/recipes/{self.first.id}'
+        for method, path, status_code in (
+                ('post', 'favorite', 201), ('delete', 'favorite', 204),
+                ('post', 'shopping_cart', 201),
+                ('delete', 'shopping_cart', 204)):
+            with self.subTest(method=method, path=path):
+                with mock.patch('api.views.lock_user',
+                                wraps=lock_user) as lock:
+                    response = getattr(self.client, method)(
+                        f'{url}/{path}/'
+                    )
+                self.assertEqual(response.status_code, status_code)
+                lock.assert_called_once_with(self.user)
+        self.assertEqual(self.get_counts(self.first, 'favorites_count'), 0)
+        self.assertEqual(self.get_counts(self.first, 'shopping_count'), 0)
@@ -0,0 +1,107 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_tag, create_user,
+)
+from users.models import Subscription
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.author = create_user()
+        self.recipe = create_recipe(self.author)
+        self.detail_url = f'/api/recipes/{self.recipe.id}/'
+
+    def assertNotModified(self, url, params=None, **headers):
+        response = self.client.get(url, params, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def get_etag(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Authorization', response['Vary'])
+        return response['ETag']
+
+    def test_recipe_detail(self):
+        response = self.client.get(self.detail_url)
+        etag = response['ETag']
+
+        self.assertNotModified(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.recipe.cooking_time += 1
+        self.recipe.save()
+        self.assertNotEqual(self.get_etag(self.detail_url), etag)
+
+    def test_recipe_detail_ignores_if_modified_since(self):
+        # Правки автора и тегов не меняют дату изменения рецепта.
+        tag = create_tag()
+        self.recipe.tags.add(tag)
+        self.author.first_name = 'Новое имя'
+        self.author.save()
+        tag.name = 'Новый тег'
+        tag.save()
+
+        response = self.client.get(
+            self.detail_url,
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author']['first_name'], 'Новое имя')
+        self.assertEqual(response.data['tags'][0]['name'], 'Новый тег')
+
+    def test_recipe_detail_etag_follows_user_flags(self):
+        user = create_user()
+        self.client.force_authenticate(user)
+        etag = self.get_etag(self.detail_url)
+        self.assertNotModified(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        Favorite.objects.create(user=user, recipe=self.recipe)
+
+        self.assertNotEqual(self.get_etag(self.detail_url), etag)
+
+    def test_recipe_list(self):
+        url = '/api/recipes/'
+        etag = self.get_etag(url)
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+        create_recipe(self.author)
+
+        self.assertNotEqual(self.get_etag(url), etag)
+
+    def test_feed(self):
+        url = '/api/recipes/feed/'
+        user = create_user()
+        Subscription.objects.create(user=user, author=self.author)
+        self.client.force_authenticate(user)
+        etag = self.get_etag(url)
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+        create_recipe(self.author)
+
+        self.assertNotEqual(self.get_etag(url), etag)
+
+    def test_tags(self):
+        tag = create_tag()
+        etag = self.get_etag('/api/tags/')
+        self.assertNotModified('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+
+        tag.color = '#000000'
+        tag.save()
+
+        self.assertNotEqual(self.get_etag('/api/tags/'), etag)
+
+    def test_ingredient_search(self):
+        create_ingredient(name='мука')
+        params = {'name': 'му'}
+        etag = self.get_etag('/api/ingredients/', params)
+        self.assertNotModified(
+            '/api/ingredients/', params, HTTP_IF_NONE_MATCH=etag
+        )
+
+        create_ingredient(name='мускат')
+
+        self.assertNotEqual(self.get_etag('/api/ingredients/', params), etag)
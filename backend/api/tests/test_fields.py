@@ -0,0 +1,67 @@
+import base64
+import io
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api.fields import SpooledBase64ImageField
+
+
+def make_png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class SpooledBase64ImageFieldTests(SimpleTestCase):
+    def setUp(self):
+        self.png = make_png()
+        self.field = SpooledBase64ImageField()
+
+    def decode(self, encoded):
+        file = self.field.to_internal_value(
+            f'data:image/png;base64,{encoded}'
+        )
+        self.assertTrue(file.name.endswith('.png'))
+        return file.read()
+
+    def test_plain_base64(self):
+        self.assertEqual(
+            self.decode(base64.b64encode(self.png).decode()), self.png
+        )
+
+    @mock.patch('api.fields.BASE64_CHUNK_SIZE', 50)
+    def test_mime_wrapped_base64(self):
+        # Строки по 76 знаков с \r\n: границы кусков не кратны 4
+        # после удаления переносов.
+        encoded = base64.encodebytes(self.png).decode().replace(
+            '\n', '\r\n'
+        )
+
+        self.assertEqual(self.decode(encoded), self.png)
+
+    def test_invalid_base64(self):
+        encoded = base64.b64encode(self.png).decode()[:-1]
+
+        with self.assertRaises(ValidationError) as error:
+            self.decode(encoded)
+        self.assertEqual(error.exception.detail[0].code, 'invalid_base64')
+
+    @override_settings(RECIPE_IMAGE_MAX_SIZE=100)
+    def test_too_large(self):
+        with self.assertRaises(ValidationError) as error:
+            self.decode(base64.b64encode(self.png * 10).decode())
+        self.assertEqual(error.exception.detail[0].code, 'too_large')
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels(self):
+        with self.assertRaises(ValidationError) as error:
+            self.decode(base64.b64encode(self.png).decode())
+        self.assertEqual(error.exception.detail[0].code, 'too_many_pixels')
+
+    def test_not_an_image(self):
+        with self.assertRaises(ValidationError) as error:
+            self.decode(base64.b64encode(b'not an image').decode())
+        self.assertEqual(error.exception.detail[0].code, 'invalid_image')
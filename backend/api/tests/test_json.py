@@ -0,0 +1,88 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from recipes.models import Favorite
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_tag, create_user,
+)
+
+
+class FastJSONTests(SimpleTestCase):
+    def assertRendersLikeDRF(self, data, media_type=None):
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(data, media_type)),
+            json.loads(JSONRenderer().render(data, media_type)),
+        )
+
+    def test_rendering_matches_drf(self):
+        self.assertRendersLikeDRF({
+            'date': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456,
+                                      tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 1),
+            'amount': decimal.Decimal('1.50'),
+            'id': uuid.UUID(int=1),
+            'name': 'Борщ',
+        })
+
+    def test_integer_keys_fall_back_to_drf(self):
+        self.assertRendersLikeDRF({'recipes': {0: ['Ошибка']}})
+
+    def test_indent(self):
+        content = FastJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=4'
+        )
+
+        self.assertIn(b'\n    "a"', content)
+
+    def test_parser(self):
+        parser = FastJSONParser()
+
+        self.assertEqual(
+            parser.parse(io.BytesIO('{"name": "Щи"}'.encode())),
+            {'name': 'Щи'},
+        )
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"name":'))
+
+
+class FastSerializerTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        user = create_user()
+        for _ in range(3):
+            recipe = create_recipe(
+                create_user(), tags=[create_tag()],
+                ingredients=[(create_ingredient(), 10)],
+            )
+        Favorite.objects.create(user=user, recipe=recipe)
+        self.client.force_authenticate(user)
+
+    def get_list(self):
+        clear_caches()
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_values_path_matches_serializer(self):
+        with override_settings(RECIPE_FAST_SERIALIZER=False):
+            expected = self.get_list()
+
+        self.assertEqual(self.get_list(), expected)
+
+    @override_settings(RECIPE_MAX_REQUEST_SIZE=100)
+    def test_large_body_is_rejected(self):
+        response = self.client.post(
+            '/api/recipes/', {'text': 'х' * 200}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 413)
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient
+from recipes.tests.factories import clear_caches
+
+
+class LoaderTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def load(self, path, *args):
+        call_command('loader', '--path', path, *args, stdout=StringIO())
+        return set(Ingredient.objects.values_list(
+            'name', 'measurement_unit'
+        ))
+
+    def test_csv_load_is_idempotent(self):
+        path = self.write('ingredients.csv',
+                          'мука, г\nсоль,г\n\nмука,г\nмолоко,мл\n')
+
+        self.assertEqual(self.load(path), {
+            ('мука', 'г'), ('соль', 'г'), ('молоко', 'мл'),
+        })
+        self.assertEqual(len(self.load(path, '--batch-size', '1')), 3)
+        self.assertEqual(Ingredient.objects.count(), 3)
+
+    def test_json_load_with_clear(self):
+        Ingredient.objects.create(name='сахар', measurement_unit='г')
+        path = self.write('ingredients.json', json.dumps([
+            {'name': 'яйцо', 'measurement_unit': 'шт.'},
+        ]))
+
+        self.assertEqual(self.load(path, '--clear'), {('яйцо', 'шт.')})
+
+    def test_loaded_ingredients_are_searchable(self):
+        self.client.get('/api/ingredients/', {'name': 'мёд'})
+        path = self.write('ingredients.csv', 'мёд,г\n')
+
+        self.load(path)
+
+        response = self.client.get('/api/ingredients/', {'name': 'мёд'})
+        self.assertEqual([item['name'] for item in response.data], ['мёд'])
@@ -0,0 +1,67 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import modify_settings
+from rest_framework.test import APITestCase
+
+from api import metrics
+from api.views import RecipeViewSet
+from recipes.models import Favorite
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_tag, create_user,
+)
+from users.models import Subscription
+
+
+@modify_settings(MIDDLEWARE={
+    'prepend': 'api.metrics.RequestMetricsMiddleware',
+})
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        metrics.histogram.reset()
+        self.addCleanup(metrics.histogram.reset)
+        create_recipe(create_user())
+
+    def test_server_timing_and_histogram(self):
+        response = self.client.get('/api/recipes/')
+
+        self.assertIn('queries"', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+        stats = metrics.histogram.snapshot()['RecipeViewSet.list']
+        self.assertEqual(stats['count'], 1)
+        self.assertGreater(stats['queries'], 0)
+        self.assertEqual(stats['over_budget'], 0)
+
+    def test_over_budget_is_logged(self):
+        with mock.patch.dict(RecipeViewSet.query_budgets, {'list': 0}), \
+                self.assertLogs('api.metrics', 'WARNING'):
+            self.client.get('/api/recipes/')
+
+        stats = metrics.histogram.snapshot()['RecipeViewSet.list']
+        self.assertEqual(stats['over_budget'], 1)
+
+    def test_metrics_endpoint_is_for_admins(self):
+        self.client.force_authenticate(create_user())
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+        self.client.force_authenticate(create_user(is_staff=True))
+        response = self.client.get('/api/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('views', response.data)
+
+
+class QueryBudgetsCommandTests(APITestCase):
+    def test_budgets_hold_on_small_database(self):
+        user, author = create_user(), create_user()
+        Subscription.objects.create(user=user, author=author)
+        tag = create_tag()
+        for _ in range(3):
+            recipe = create_recipe(
+                author, tags=[tag], ingredients=[(create_ingredient(), 5)]
+            )
+            Favorite.objects.create(user=user, recipe=recipe)
+
+        call_command('check_query_budgets', stdout=StringIO())
@@ -0,0 +1,50 @@
+from rest_framework.test import APITestCase
+
+from recipes.tests.factories import clear_caches, create_recipe, create_user
+
+
+class KeysetPaginationTests(APITestCase):
+    url = '/api/recipes/'
+
+    def setUp(self):
+        clear_caches()
+        author = create_user()
+        self.recipes = [
+            create_recipe(author, name=f'Суп {number}',
+                          cooking_time=30 - number)
+            for number in range(5)
+        ]
+
+    def test_cursor_walks_all_recipes_newest_first(self):
+        ids, params = [], {'pagination': 'cursor', 'limit': 2}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            if response.data['next'] is None:
+                break
+            params = {}
+            self.url = response.data['next']
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(self.recipes)])
+
+    def test_cursor_keeps_requested_ordering(self):
+        self.recipes[0].cooking_time = 1
+        self.recipes[0].save()
+
+        response = self.client.get(self.url, {
+            'pagination': 'cursor', 'ordering': 'quickest', 'limit': 2,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(
+            [recipe['cooking_time'] for recipe in response.data['results']],
+            [1, 26],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'не курсор'})
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, Shopping
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_tag, create_user,
+)
+from users.models import Subscription
+
+
+class RecipeListQueriesTests(APITestCase):
+    url = '/api/recipes/'
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.tags = [create_tag(), create_tag()]
+        self.ingredients = [create_ingredient(), create_ingredient()]
+
+    def add_recipes(self, count):
+        for _ in range(count):
+            recipe = create_recipe(
+                create_user(), tags=self.tags,
+                ingredients=[(item, 10) for item in self.ingredients],
+            )
+            Favorite.objects.create(user=self.user, recipe=recipe)
+            Shopping.objects.create(user=self.user, recipe=recipe)
+            Subscription.objects.create(user=self.user, author=recipe.author)
+
+    def count_queries(self):
+        clear_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data['results']
+
+    def test_query_count_does_not_grow_with_page(self):
+        self.add_recipes(2)
+        small, _ = self.count_queries()
+        self.add_recipes(6)
+
+        large, results = self.count_queries()
+
+        self.assertEqual(large, small)
+        self.assertEqual(len(results), 8)
+        recipe = results[0]
+        self.assertTrue(recipe['is_favorited'])
+        self.assertTrue(recipe['is_in_shopping_cart'])
+        self.assertTrue(recipe['author']['is_subscribed'])
+        self.assertEqual(len(recipe['tags']), 2)
+        self.assertEqual(len(recipe['ingredients']), 2)
@@ -0,0 +1,144 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from recipes.models import IngredientAmount, Shopping, ShoppingListItem
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_tag, create_user,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_data_url():
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4)).save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+class RecipeUpdateTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.author = create_user()
+        self.client.force_authenticate(self.author)
+        self.tag = create_tag()
+        self.ingredients = [create_ingredient() for _ in range(20)]
+
+    def create_recipe(self, count):
+        return create_recipe(self.author, tags=[self.tag], ingredients=[
+            (ingredient, 10) for ingredient in self.ingredients[:count]
+        ])
+
+    def patch(self, recipe, ingredients):
+        return self.client.patch(f'/api/recipes/{recipe.id}/', {
+            'tags': [self.tag.id], 'ingredients': ingredients,
+        }, format='json')
+
+    def count_update_queries(self, count):
+        recipe = self.create_recipe(count)
+        Shopping.objects.create(user=create_user(), recipe=recipe)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(recipe, [
+                {'id': self.ingredients[0].id, 'amount': 10},
+            ])
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_removed_ingredients_do_not_add_queries(self):
+        self.assertEqual(
+            self.count_update_queries(3), self.count_update_queries(20)
+        )
+
+    def test_update_applies_deltas_to_shopping_lists(self):
+        recipe = self.create_recipe(3)
+        buyer = create_user()
+        Shopping.objects.create(user=buyer, recipe=recipe)
+        first, second, third, new = self.ingredients[:4]
+
+        response = self.patch(recipe, [
+            {'id': first.id, 'amount': 10},
+            {'id': second.id, 'amount': 25},
+            {'id': new.id, 'amount': 5},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dict(ShoppingListItem.objects.filter(
+            user=buyer
+        ).values_list('ingredient_id', 'total_amount')), {
+            first.id: 10, second.id: 25, new.id: 5,
+        })
+        self.assertFalse(IngredientAmount.objects.filter(
+            recipe=recipe, ingredient=third
+        ).exists())
+
+    def test_non_finite_amount_is_rejected(self):
+        recipe = self.create_recipe(1)
+        for amount in ('nan', 'inf', '-inf', '1e400'):
+            with self.subTest(amount=amount):
+                response = self.patch(recipe, [
+                    {'id': self.ingredients[0].id, 'amount': amount},
+                ])
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ingredients', response.data)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeCreateTests(APITestCase):
+    url = '/api/recipes/'
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        clear_caches()
+        self.client.force_authenticate(create_user())
+        self.tag = create_tag()
+        self.flour, self.milk = create_ingredient(), create_ingredient()
+
+    def post(self, **fields):
+        return self.client.post(self.url, {
+            'name': 'Блины', 'text': 'Смешать', 'cooking_time': 20,
+            'image': make_data_url(),
+            'tags': [self.tag.id],
+            'ingredients': [{'id': self.flour.id, 'amount': 200},
+                            {'id': self.milk.id, 'amount': 300}],
+            **fields,
+        }, format='json')
+
+    def test_errors(self):
+        cases = (
+            ({'tags': []}, 400),
+            ({'ingredients': []}, 400),
+            ({'ingredients': [{'id': self.flour.id, 'amount': 1},
+                              {'id': self.flour.id, 'amount': 2}]}, 400),
+            ({'ingredients': [{'id': self.flour.id}]}, 400),
+            ({'ingredients': [5]}, 400),
+            ({'ingredients': [[self.flour.id, 1]]}, 400),
+            ({'ingredients': [{'id': self.flour.id, 'amount': 0}]}, 400),
+            ({'ingredients': [{'id': self.milk.id + 100, 'amount': 1}]},
+             404),
+        )
+        for fields, status_code in cases:
+            with self.subTest(fields=fields):
+                self.assertEqual(self.post(**fields).status_code, status_code)
+        self.assertFalse(IngredientAmount.objects.exists())
+
+    def test_create(self):
+        response = self.post()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(dict(IngredientAmount.objects.filter(
+            recipe=response.data['id']
+        ).values_list('ingredient', 'amount')), {
+            self.flour.id: 200, self.milk.id: 300,
+        })
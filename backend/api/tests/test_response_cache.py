@@ -0,0 +1,75 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite
+from recipes.tests.factories import (
+    clear_caches, create_recipe, create_tag, create_user,
+)
+
+
+class RecipeResponseCacheTests(APITestCase):
+    url = '/api/recipes/'
+
+    def setUp(self):
+        clear_caches()
+        self.author = create_user()
+        self.tag = create_tag()
+        self.recipe = create_recipe(self.author, tags=[self.tag], name='Суп')
+
+    def get_names(self, url=None, **params):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.data['results']]
+
+    def rename(self, name):
+        self.recipe.name = name
+        self.recipe.save()
+
+    def test_warm_list_is_served_from_cache(self):
+        self.get_names()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_names(), ['Суп'])
+
+    def test_recipe_change_invalidates_filtered_lists(self):
+        requests = ({}, {'tags': self.tag.slug},
+                    {'author': self.author.id})
+        for params in requests:
+            self.get_names(**params)
+        self.client.get(f'{self.url}{self.recipe.id}/')
+
+        self.rename('Щи')
+
+        for params in requests:
+            with self.subTest(params=params):
+                self.assertEqual(self.get_names(**params), ['Щи'])
+        response = self.client.get(f'{self.url}{self.recipe.id}/')
+        self.assertEqual(response.data['name'], 'Щи')
+
+    def test_new_recipe_invalidates_tag_list(self):
+        self.get_names(tags=self.tag.slug)
+
+        create_recipe(create_user(), tags=[self.tag], name='Каша')
+
+        self.assertEqual(self.get_names(tags=self.tag.slug), ['Каша', 'Суп'])
+
+    def test_user_flags_are_applied_over_shared_payload(self):
+        user = create_user()
+        Favorite.objects.create(user=user, recipe=self.recipe)
+        self.get_names()
+
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url)
+
+        self.assertTrue(response.data['results'][0]['is_favorited'])
+        self.client.force_authenticate(None)
+        response = self.client.get(self.url)
+        self.assertFalse(response.data['results'][0]['is_favorited'])
+
+    def test_user_filters_are_not_shared(self):
+        user, other = create_user(), create_user()
+        Favorite.objects.create(user=user, recipe=self.recipe)
+
+        self.client.force_authenticate(user)
+        self.assertEqual(self.get_names(is_favorited=1), ['Суп'])
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get_names(is_favorited=1), [])
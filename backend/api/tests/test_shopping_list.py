@@ -0,0 +1,172 @@
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api.cache import SHOPPING_LIST_KEY
+from recipes.models import IngredientAmount, Shopping, ShoppingListItem
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_user,
+)
+
+
+class ShoppingListCacheTests(APITestCase):
+    url = '/api/recipes/download_shopping_cart/'
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.flour, self.milk = create_ingredient(), create_ingredient()
+        self.recipe = create_recipe(
+            create_user(), ingredients=((self.flour, 100), (self.milk, 50))
+        )
+        Shopping.objects.create(user=self.user, recipe=self.recipe)
+        self.key = SHOPPING_LIST_KEY.format(self.user.id)
+
+    def download(self):
+        response = self.client.get(self.url, {'format': 'txt'})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_short_list_is_cached_after_streaming(self):
+        self.assertIn(self.flour.name, self.download())
+        self.assertEqual(len(cache.get(self.key)), 2)
+
+        with self.assertNumQueries(0):
+            self.assertIn(self.milk.name, self.download())
+
+    @override_settings(SHOPPING_LIST_CACHE_MAX_ROWS=1)
+    def test_long_list_is_streamed_without_caching(self):
+        content = self.download()
+
+        self.assertIn(self.flour.name, content)
+        self.assertIn(self.milk.name, content)
+        self.assertIsNone(cache.get(self.key))
+
+    def test_cart_change_invalidates_cached_list(self):
+        self.download()
+        sugar = create_ingredient()
+        Shopping.objects.create(user=self.user, recipe=create_recipe(
+            create_user(), ingredients=((sugar, 10),)
+        ))
+
+        self.assertIsNone(cache.get(self.key))
+        self.assertIn(sugar.name, self.download())
+
+    def test_formats(self):
+        for file_format, content_type, start in (
+                ('csv', 'text/csv', '\ufeff'.encode()),
+                ('txt', 'text/plain', b''),
+                ('pdf', 'application/pdf', b'%PDF')):
+            with self.subTest(format=file_format):
+                response = self.client.get(self.url, {'format': file_format})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(
+                    response['Content-Type'].startswith(content_type)
+                )
+                content = b''.join(response.streaming_content)
+                self.assertTrue(content.startswith(start))
+
+    def test_pdf_embeds_configured_font(self):
+        response = self.client.get(self.url, {'format': 'pdf'})
+
+        self.assertIn(b'DejaVuSans', b''.join(response.streaming_content))
+
+    @override_settings(SHOPPING_LIST_PDF_FONT='/nonexistent/font.ttf')
+    def test_pdf_without_font_fails_before_streaming(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.client.get(self.url, {'format': 'pdf'})
+
+    def test_csv_rows(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+        lines = b''.join(
+            response.streaming_content
+        ).decode().lstrip('\ufeff').splitlines()
+
+        self.assertEqual(sorted(lines), sorted([
+            f'{self.flour.name},г,100.0', f'{self.milk.name},г,50.0',
+        ]))
+
+
+class ShoppingListErrorTests(APITestCase):
+    url = '/api/recipes/download_shopping_cart/'
+
+    def test_anonymous_gets_json_error(self):
+        response = self.client.get(self.url, {'format': 'csv'})
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', response.json())
+
+    def test_unknown_format_gets_json_error(self):
+        self.client.force_authenticate(create_user())
+
+        response = self.client.get(self.url, {'format': 'json'})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', response.json())
+
+
+class ShoppingListItemSyncTests(APITestCase):
+    """Суммы в ShoppingListItem при правках ингредиентов мимо API."""
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.flour, self.milk = create_ingredient(), create_ingredient()
+        self.recipe = create_recipe(
+            create_user(), ingredients=((self.flour, 100), (self.milk, 50))
+        )
+        self.other = create_recipe(
+            create_user(), ingredients=((self.flour, 30),)
+        )
+        for recipe in (self.recipe, self.other):
+            Shopping.objects.create(user=self.user, recipe=recipe)
+
+    def assertTotals(self, expected):
+        totals = dict(ShoppingListItem.objects.filter(
+            user=self.user
+        ).values_list('ingredient_id', 'total_amount'))
+        self.assertEqual(totals, expected)
+        self.assertEqual(totals, {
+            ingredient_id: total for _, ingredient_id, total
+            in ShoppingListItem.objects.aggregate_from_carts()
+        })
+
+    def get_amount(self, ingredient):
+        return IngredientAmount.objects.get(
+            recipe=self.recipe, ingredient=ingredient
+        )
+
+    def test_amount_change(self):
+        item = self.get_amount(self.flour)
+        item.amount = 120
+        item.save()
+
+        self.assertTotals({self.flour.id: 150, self.milk.id: 50})
+
+    def test_ingredient_change(self):
+        sugar = create_ingredient()
+        item = self.get_amount(self.milk)
+        item.ingredient = sugar
+        item.save()
+
+        self.assertTotals({self.flour.id: 130, sugar.id: 50})
+
+    def test_add_and_delete(self):
+        sugar = create_ingredient()
+        IngredientAmount.objects.create(
+            recipe=self.recipe, ingredient=sugar, amount=5
+        )
+        IngredientAmount.objects.filter(
+            recipe=self.recipe, ingredient=self.flour
+        ).delete()
+
+        self.assertTotals({self.flour.id: 30, self.milk.id: 50, sugar.id: 5})
+
+    def test_recipe_delete_subtracts_once(self):
+        self.recipe.delete()
+
+        self.assertTotals({self.flour.id: 30})
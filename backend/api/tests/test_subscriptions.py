@@ -0,0 +1,56 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from recipes.tests.factories import clear_caches, create_recipe, create_user
+from users.models import Subscription
+
+
+class SubscriptionsTests(APITestCase):
+    url = '/api/users/subscriptions/'
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def follow(self, count, recipes=3):
+        for _ in range(count):
+            author = create_user()
+            for _ in range(recipes):
+                create_recipe(author)
+            Subscription.objects.create(user=self.user, author=author)
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_query_count_does_not_grow_with_authors(self):
+        self.follow(1)
+        small, _ = self.get()
+        self.follow(4)
+
+        large, data = self.get()
+
+        self.assertEqual(large, small)
+        self.assertEqual(data['count'], 5)
+
+    def test_recipes_limit_keeps_newest_previews(self):
+        self.follow(2, recipes=4)
+
+        _, data = self.get(recipes_limit=2)
+
+        for author in data['results']:
+            self.assertEqual(author['recipes_count'], 4)
+            self.assertTrue(author['is_subscribed'])
+            ids = [recipe['id'] for recipe in author['recipes']]
+            self.assertEqual(len(ids), 2)
+            self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_recipes_limit_without_subscriptions(self):
+        _, data = self.get(recipes_limit=3)
+
+        self.assertEqual(data['count'], 0)
+        self.assertEqual(data['results'], [])
@@ -1,8 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from api.async_views import async_routes
 from api.views import (
-    CustomUserViewSet, IngredientViewSet, RecipeViewSet, TagViewSet,
+    CustomUserViewSet, IngredientViewSet, RecipeViewSet, RequestMetricsView,
+    TagViewSet,
 )
 
 router = DefaultRouter()
@@ -13,6 +16,18 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('tags', TagViewSet, basename='tags')
 
 urlpatterns = [
+    path('metrics/', RequestMetricsView.as_view(), name='metrics'),
+]
+
+if settings.ASYNC_VIEWS:
+    # Те же вьюсеты в пуле потоков под ASGI, остальное — через роутер.
+    urlpatterns += [
+        *async_routes('recipes', RecipeViewSet),
+        *async_routes('ingredients', IngredientViewSet),
+        *async_routes('tags', TagViewSet),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
     path('api/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
@@ -1,22 +1,88 @@
 import csv
+import io
+import os
 
-from django.db.models import Sum
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
 
-from recipes.models import IngredientAmount
+from recipes.models import ShoppingListItem
 
+CHUNK_SIZE = 2000
+PDF_FONT = 'ShoppingListFont'
 
-def create_shopping_list(user, response):
-    ingredients = IngredientAmount.objects.filter(
-        recipe__shopping__user=user
-    ).values(
-        'ingredient__name', 'ingredient__measurement_unit'
-    ).annotate(ingredient_amount=Sum('amount')).values_list(
-        'ingredient__name', 'ingredient__measurement_unit',
-        'ingredient_amount')
 
-    response.write(u'\ufeff'.encode('utf8'))
-    writer = csv.writer(response)
-    for item in list(ingredients):
-        writer.writerow(item)
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
 
-    return response
+    def write(self, value):
+        return value
+
+
+def get_shopping_list(user):
+    return ShoppingListItem.objects.filter(user=user).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'total_amount'
+    ).order_by('ingredient__name').iterator(chunk_size=CHUNK_SIZE)
+
+
+def stream_csv(rows):
+    yield u'\ufeff'
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_txt(rows):
+    for name, unit, amount in rows:
+        yield f'{name} ({unit}) — {amount:g}\n'
+
+
+def _get_pdf_font():
+    """Шрифт с кириллицей: встроенные шрифты PDF её не рисуют."""
+    path = getattr(settings, 'SHOPPING_LIST_PDF_FONT', None)
+    if not path or not os.path.exists(path):
+        raise ImproperlyConfigured(
+            f'Не найден шрифт для PDF SHOPPING_LIST_PDF_FONT={path!r}.'
+        )
+    if PDF_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(PDF_FONT, path))
+    return PDF_FONT
+
+
+def stream_pdf(rows):
+    # Шрифт проверяется до начала потокового ответа.
+    return _stream_pdf(rows, _get_pdf_font())
+
+
+def _stream_pdf(rows, font):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - 50
+    pdf.setFont(font, 14)
+    pdf.drawString(50, y, 'Список покупок')
+    pdf.setFont(font, 11)
+    for name, unit, amount in rows:
+        y -= 20
+        if y < 50:
+            pdf.showPage()
+            pdf.setFont(font, 11)
+            y = height - 50
+        pdf.drawString(50, y, f'{name} ({unit}) — {amount:g}')
+    pdf.save()
+    buffer.seek(0)
+    yield from iter(lambda: buffer.read(CHUNK_SIZE * 32), b'')
+
+
+SHOPPING_LIST_WRITERS = {
+    'csv': stream_csv,
+    'txt': stream_txt,
+    'pdf': stream_pdf,
+}
+
+
+def create_shopping_list(rows, file_format='csv'):
+    return SHOPPING_LIST_WRITERS[file_format](rows)
@@ -1,29 +1,55 @@
-from django.http import HttpResponse
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from api import metrics, response_cache
+from api.autocomplete import autocomplete
+from api.bulk import add_recipes, clear_cart, lock_user, remove_recipes
+from api.cache import get_cached_shopping_list
+from api.conditional import (
+    VersionETagMixin, conditional, make_etag, recipe_fingerprint,
+)
+from api.fast_serializers import recipe_values, serialize_recipes
 from api.filters import AuthorTagFilter, IngredientSearchFilter
-from api.pagination import LimitPageNumberPagination
+from api.mixins import MetricsMixin, ReferenceCacheMixin
+from api.pagination import (
+    FeedPagination, LimitPageNumberPagination, RecipePagination,
+)
+from api.parsers import SizeLimitedJSONParser, SizeLimitedMultiPartParser
 from api.permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from api.renderers import (
+    ShoppingListCSVRenderer, ShoppingListPDFRenderer, ShoppingListTXTRenderer,
+)
 from api.serializers import (
-    CustomUserSerializer, IngredientSerializer, RecipeSerializer,
-    SetPasswordSerializer, ShortRecipeSerializer, SubscriptionSerializer,
-    TagSerializer, UserCreateSerializer, FollowSerializer,
-    ShoppingCartSerializer,
+    CustomUserSerializer, IngredientSerializer, RecipeIdsSerializer,
+    RecipeSerializer, SetPasswordSerializer, ShortRecipeSerializer,
+    SubscriptionSerializer, TagSerializer, UserCreateSerializer,
+    FollowSerializer, ShoppingCartSerializer,
 )
 from api.utils import create_shopping_list
+from recipes.feed import backfill, prune
 from recipes.models import (
-    Favorite, Ingredient, Recipe, Shopping, Tag,
+    Favorite, Ingredient, Recipe, Shopping, Tag, get_recipe_prefetches,
 )
+from recipes.versions import INGREDIENTS, TAGS, get_version
 from users.models import Subscription, User
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(MetricsMixin, UserViewSet):
     pagination_class = LimitPageNumberPagination
+    query_budgets = {'subscriptions': 4}
 
     def get_serializer_class(self):
         if self.action == 'subscribe':
@@ -55,6 +81,7 @@ class CustomUserViewSet(UserViewSet):
                 user=request.user
             )
             self.perform_destroy(subscription)
+            prune(request.user.id, subscription.author_id)
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         serializer = FollowSerializer(
@@ -65,40 +92,146 @@ class CustomUserViewSet(UserViewSet):
             context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        subscription = serializer.save()
+        backfill(request.user.id, subscription.author_id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['get'],
             permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         user = request.user
-        queryset = Subscription.objects.filter(user=user)
+        queryset = Subscription.objects.filter(
+            user=user
+        ).select_related('author').annotate(
+            recipes_count=Coalesce('author__stats__recipes_count', 0)
+        )
         pages = self.paginate_queryset(queryset)
+        limit = request.GET.get('recipes_limit')
+        recipes = Recipe.objects.previews_by_author(
+            [subscription.author_id for subscription in pages],
+            int(limit) if limit else None,
+        )
         serializer = SubscriptionSerializer(
             pages,
             many=True,
-            context={'request': request}
+            context={'request': request, 'recipes': recipes}
         )
         return self.get_paginated_response(serializer.data)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(MetricsMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
-    pagination_class = LimitPageNumberPagination
+    pagination_class = RecipePagination
     filterset_class = AuthorTagFilter
     permission_classes = (IsAuthorOrReadOnly,)
+    parser_classes = (SizeLimitedJSONParser, SizeLimitedMultiPartParser)
+    # С холодными кэшами и на странице любого размера.
+    query_budgets = {'list': 10, 'retrieve': 8, 'feed': 10}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'feed'):
+            # Ингредиенты и теги подгружаются только после проверки ETag.
+            queryset = queryset.select_related('author').with_user_flags(
+                self.request.user
+            )
+        return queryset
+
+    def get_etag(self, request, *fingerprints):
+        return make_etag(
+            request.get_full_path(), request.accepted_media_type,
+            request.user.pk, get_version(TAGS), get_version(INGREDIENTS),
+            *fingerprints,
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not response_cache.is_cacheable(request):
+            return self._conditional_list(
+                self.filter_queryset(self.get_queryset())
+            )
+        key = response_cache.list_key(request)
+        payload = response_cache.get_or_set(key, self._render_shared_list)
+        results, flags = response_cache.with_user_flags(
+            request.user, payload['results']
+        )
+        return conditional(
+            request, lambda: Response({**payload, 'results': results}),
+            etag=make_etag(key, flags),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        key = response_cache.detail_key(request, pk)
+        payload = response_cache.get_or_set(
+            key, partial(self._render_shared_detail, pk)
+        )
+        (data,), flags = response_cache.with_user_flags(
+            request.user, [payload['data']]
+        )
+        return conditional(
+            request, lambda: Response(data),
+            etag=make_etag(key, flags),
+        )
+
+    def get_shared_queryset(self):
+        """Рецепты с гостевыми флагами — общая часть кэша ответов."""
+        return Recipe.objects.select_related('author').with_user_flags(
+            AnonymousUser()
+        )
+
+    def _render_shared_list(self):
+        queryset = self.filter_queryset(self.get_shared_queryset())
+        if not settings.RECIPE_FAST_SERIALIZER:
+            return self._render_page(self.paginate_queryset(queryset)).data
+        page = self.paginate_queryset(recipe_values(queryset))
+        with metrics.measure('serializer'):
+            data = serialize_recipes(page, self.request)
+        return self.get_paginated_response(data).data
+
+    def _render_shared_detail(self, pk):
+        recipe = get_object_or_404(self.get_shared_queryset(), pk=pk)
+        return {'data': self.get_serializer(recipe).data}
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated],
+            pagination_class=FeedPagination)
+    def feed(self, request):
+        return self._conditional_list(
+            self.filter_queryset(self.get_queryset())
+        )
+
+    def _conditional_list(self, queryset):
+        page = self.paginate_queryset(queryset)
+        meta = self.get_paginated_response([]).data
+        meta.pop('results')
+        etag = self.get_etag(
+            self.request, sorted(meta.items()),
+            *(recipe_fingerprint(recipe) for recipe in page)
+        )
+        return conditional(
+            self.request, partial(self._render_page, page), etag=etag
+        )
+
+    def _render_page(self, page):
+        prefetch_related_objects(page, *get_recipe_prefetches())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post', 'delete'],
             permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def favorite(self, request, pk=None):
+        lock_user(request.user)
         if self.request.method == 'POST':
             return self._add_obj(Favorite, request.user, pk)
         return self._delete_obj(Favorite, request.user, pk)
 
     @action(detail=True, methods=['post'],
             permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def shopping_cart(self, request, pk):
+        lock_user(request.user)
         data = {'user': request.user.id, 'recipe': pk}
         serializer = ShoppingCartSerializer(
             data=data,
@@ -109,8 +242,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @shopping_cart.mapping.delete
+    @transaction.atomic
     def delete_shopping_cart(self, request, pk):
         user = request.user
+        lock_user(user)
         recipe = get_object_or_404(Recipe, id=pk)
         shopping_list = get_object_or_404(
             Shopping,
@@ -120,13 +255,49 @@ class RecipeViewSet(viewsets.ModelViewSet):
         shopping_list.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, methods=['get'],
+    @action(detail=False, methods=['post', 'delete'], url_path='favorite',
+            permission_classes=[IsAuthenticated])
+    def favorite_bulk(self, request):
+        return self._bulk(Favorite, request)
+
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart', permission_classes=[IsAuthenticated])
+    def shopping_cart_bulk(self, request):
+        return self._bulk(Shopping, request)
+
+    @action(detail=False, methods=['delete'], url_path='shopping_cart/clear',
             permission_classes=[IsAuthenticated])
+    def clear_shopping_cart(self, request):
+        clear_cart(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @staticmethod
+    def _bulk(model, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operation = add_recipes if request.method == 'POST' else remove_recipes
+        statuses = operation(
+            model, request.user, serializer.validated_data['recipes']
+        )
+        return Response([{'id': pk, 'status': value}
+                         for pk, value in statuses.items()])
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[IsAuthenticated],
+            renderer_classes=[ShoppingListCSVRenderer,
+                              ShoppingListTXTRenderer,
+                              ShoppingListPDFRenderer])
     def download_shopping_cart(self, request):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = ('attachment;'
-                                           'filename="Список покупок.csv"')
-        create_shopping_list(request.user, response)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            create_shopping_list(get_cached_shopping_list(request.user),
+                                 renderer.format),
+            content_type=renderer.media_type,
+        )
+        response['Content-Disposition'] = (
+            'attachment;'
+            f'filename="Список покупок.{renderer.format}"'
+        )
         return response
 
     @staticmethod
@@ -144,15 +315,44 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(MetricsMixin, VersionETagMixin, ReferenceCacheMixin,
+                        viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (IngredientSearchFilter,)
     search_fields = ('^name',)
+    etag_version = reference = INGREDIENTS
+    query_budgets = {'list': 3, 'retrieve': 3}
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get(IngredientSearchFilter.search_param)
+        if name:
+            return conditional(
+                request, lambda: Response(autocomplete(name)),
+                etag=self.get_etag(request),
+            )
+        return super().list(request, *args, **kwargs)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(MetricsMixin, VersionETagMixin, ReferenceCacheMixin,
+                 viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    etag_version = reference = TAGS
+    query_budgets = {'list': 3, 'retrieve': 3}
+
+
+class RequestMetricsView(APIView):
+    """Гистограмма api.metrics: этого процесса или (?all=1) всех."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        if request.query_params.get('all'):
+            views, workers = metrics.collect()
+            return Response({'workers': workers, 'views': views})
+        return Response({
+            'enabled': settings.REQUEST_METRICS,
+            'views': metrics.histogram.snapshot(),
+        })
@@ -38,6 +38,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', default='0') == '1'
+REQUEST_METRICS_PUBLISH_INTERVAL = int(os.getenv(
+    'REQUEST_METRICS_PUBLISH_INTERVAL', default=10
+))
+if REQUEST_METRICS:
+    MIDDLEWARE.insert(0, 'api.metrics.RequestMetricsMiddleware')
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -58,6 +65,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='0') == '1'
+ASYNC_VIEWS_THREADS = int(os.getenv('ASYNC_VIEWS_THREADS', default=16))
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
@@ -69,6 +79,76 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+SHOPPING_LIST_CACHE_TIMEOUT = int(os.getenv(
+    'SHOPPING_LIST_CACHE_TIMEOUT', default=60 * 60
+))
+SHOPPING_LIST_CACHE_MAX_ROWS = int(os.getenv(
+    'SHOPPING_LIST_CACHE_MAX_ROWS', default=500
+))
+
+INGREDIENT_AUTOCOMPLETE_LIMIT = int(os.getenv(
+    'INGREDIENT_AUTOCOMPLETE_LIMIT', default=20
+))
+
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+
+APPROXIMATE_COUNT_THRESHOLD = int(os.getenv(
+    'APPROXIMATE_COUNT_THRESHOLD', default=100_000
+))
+
+IMAGE_PIPELINE_BACKEND = os.getenv('IMAGE_PIPELINE_BACKEND', default='thread')
+IMAGE_PIPELINE_WORKERS = int(os.getenv('IMAGE_PIPELINE_WORKERS', default=2))
+
+RECIPE_IMAGE_MAX_SIZE = int(os.getenv(
+    'RECIPE_IMAGE_MAX_SIZE', default=5 * 1024 * 1024
+))
+RECIPE_IMAGE_MAX_PIXELS = int(os.getenv(
+    'RECIPE_IMAGE_MAX_PIXELS', default=40_000_000
+))
+RECIPE_MAX_REQUEST_SIZE = int(os.getenv(
+    'RECIPE_MAX_REQUEST_SIZE', default=8 * 1024 * 1024
+))
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+
+TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', default=14))
+TRENDING_HALF_LIFE_DAYS = float(os.getenv(
+    'TRENDING_HALF_LIFE_DAYS', default=3
+))
+TRENDING_CART_WEIGHT = float(os.getenv('TRENDING_CART_WEIGHT', default=0.5))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', default=10_000))
+FEED_BACKFILL_LIMIT = int(os.getenv('FEED_BACKFILL_LIMIT', default=500))
+
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(os.getenv(
+    'RECIPE_RESPONSE_CACHE_TIMEOUT', default=10 * 60
+))
+
+BULK_RECIPES_LIMIT = int(os.getenv('BULK_RECIPES_LIMIT', default=100))
+
+RECIPE_FAST_SERIALIZER = os.getenv(
+    'RECIPE_FAST_SERIALIZER', default='1'
+) == '1'
+
+REFERENCE_CACHE_TTL = int(os.getenv('REFERENCE_CACHE_TTL', default=60))
+REFERENCE_CACHE_MAXSIZE = int(os.getenv('REFERENCE_CACHE_MAXSIZE', default=16))
+REFERENCE_CACHE_TIMEOUT = int(os.getenv(
+    'REFERENCE_CACHE_TIMEOUT', default=24 * 60 * 60
+))
+
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', default=10))
+TOKEN_CACHE_MAXSIZE = int(os.getenv('TOKEN_CACHE_MAXSIZE', default=10_000))
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', default=5 * 60))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -86,7 +166,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachingTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -94,6 +174,15 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 DJOSER = {
@@ -124,3 +213,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
@@ -0,0 +1,20 @@
+"""Настройки gunicorn; подхватываются из рабочей папки автоматически."""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def post_worker_init(worker):
+    """Прогревает справочники и индекс подсказок до первого запроса."""
+    from django.db import connections
+
+    from api import autocomplete
+    from recipes import reference
+
+    try:
+        reference.warm_up()
+        autocomplete.warm_up()
+    except Exception:
+        logger.exception('Не удалось прогреть кэш справочников')
+    finally:
+        connections.close_all()
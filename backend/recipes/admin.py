@@ -1,8 +1,8 @@
 from django.contrib import admin
 
 from recipes.models import (
-    Favorite, Ingredient, IngredientAmount, Recipe, Shopping, Tag,
-    TagRecipe,
+    Favorite, Ingredient, IngredientAmount, Recipe, RecipeScore, Shopping,
+    ShoppingListItem, Tag, TagRecipe,
 )
 
 
@@ -36,15 +36,17 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'favorite_count',)
+    list_select_related = ('author',)
     search_fields = ('name',)
     list_filter = ('name', 'author', 'tags')
     inlines = (IngredientInline, TagsInline)
     empty_value_display = '--пусто--'
 
     def favorite_count(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
     favorite_count.short_description = 'В избранном'
+    favorite_count.admin_order_field = 'favorites_count'
 
 
 @admin.register(Favorite)
@@ -61,3 +63,18 @@ class ShoppingAdmin(admin.ModelAdmin):
     search_fields = ('user',)
     list_filter = ('user',)
     empty_value_display = '--пусто--'
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ingredient', 'total_amount')
+    search_fields = ('user',)
+    list_filter = ('user',)
+    empty_value_display = '--пусто--'
+
+
+@admin.register(RecipeScore)
+class RecipeScoreAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'popular', 'trending', 'updated_at')
+    list_select_related = ('recipe',)
+    empty_value_display = '--пусто--'
@@ -0,0 +1,95 @@
+"""Лента «рецепты авторов, на которых я подписан».
+
+Новые рецепты раскладываются по лентам подписчиков при публикации.
+Для авторов с подписчиками больше FEED_FANOUT_LIMIT раскладка не
+делается, их рецепты подмешиваются при чтении.
+
+Страница ленты читается курсором по индексу (user, -pub_date, -recipe)
+записей ленты, к ней подмешивается такая же страница рецептов
+«тяжёлых» авторов, и только после слияния загружаются сами рецепты.
+"""
+from heapq import merge
+
+from django.conf import settings
+from django.db.models import Q
+
+from recipes.models import FeedItem, Recipe
+from users.models import AuthorStats, Subscription
+
+
+def is_fanned_out(author_id):
+    return not AuthorStats.objects.filter(
+        author_id=author_id,
+        subscribers_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out_recipe(recipe):
+    if not is_fanned_out(recipe.author_id):
+        return
+    followers = Subscription.objects.filter(
+        author_id=recipe.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=user_id, recipe_id=recipe.id,
+                  author_id=recipe.author_id, pub_date=recipe.pub_date)
+         for user_id in followers.iterator()),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    if not is_fanned_out(author_id):
+        return
+    recipes = Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list('id', 'pub_date')[:settings.FEED_BACKFILL_LIMIT]
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=user_id, recipe_id=recipe_id,
+                  author_id=author_id, pub_date=pub_date)
+         for recipe_id, pub_date in recipes),
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_id, author_id):
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def before(cursor, recipe_field):
+    """Условие курсора по (-pub_date, -id)."""
+    if cursor is None:
+        return Q()
+    pub_date, pk = cursor
+    return (Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, **{f'{recipe_field}__lt': pk}))
+
+
+def get_feed(queryset, user, cursor, limit):
+    """Не больше limit рецептов ленты после cursor, новые первыми.
+
+    Фильтры queryset применяются к обеим частям ленты, его сортировка
+    игнорируется.
+    """
+    items = FeedItem.objects.filter(before(cursor, 'recipe_id'), user=user)
+    if queryset.query.where:
+        items = items.filter(recipe__in=queryset.order_by().values('pk'))
+    positions = [items.order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id'
+    )[:limit]]
+    pulled = list(Subscription.objects.filter(
+        user=user,
+        author__stats__subscribers_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True))
+    if pulled:
+        positions.append(queryset.filter(
+            before(cursor, 'pk'), author__in=pulled
+        ).order_by('-pub_date', '-pk').values_list('pub_date', 'pk')[:limit])
+    # Рецепты «тяжёлого» автора могли попасть в ленту раньше, когда
+    # подписчиков было меньше лимита.
+    ids = list(dict.fromkeys(
+        recipe_id for _, recipe_id in merge(*positions, reverse=True)
+    ))[:limit]
+    recipes = queryset.order_by().in_bulk(ids)
+    return [recipes[pk] for pk in ids if pk in recipes]
@@ -0,0 +1,123 @@
+"""Уменьшенные копии фото рецептов для ленты, карточки и страницы.
+
+Копии строятся вне потока запроса: в пуле потоков (по умолчанию)
+или синхронно, если IMAGE_PIPELINE_BACKEND = 'sync'. В имени копии —
+хэш исходного фото: после замены фото меняются и URL копий, так что
+кэши не отдают старые байты, а прежние копии удаляются.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+from recipes.versions import bump_recipes
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    'list': 360,
+    'card': 640,
+    'detail': 1200,
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANTS_DIR = 'recipes_photo/variants'
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PIPELINE_WORKERS,
+            thread_name_prefix='recipe-images',
+        )
+    return _executor
+
+
+def render_variants(file):
+    """Возвращает {(размер, формат): bytes} без EXIF и прочих метаданных."""
+    with Image.open(file) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+    rendered = {}
+    for size, width in VARIANTS.items():
+        variant = image.copy()
+        variant.thumbnail((width, width), Image.LANCZOS)
+        for extension, (pil_format, params) in FORMATS.items():
+            buffer = io.BytesIO()
+            variant.save(buffer, pil_format, **params)
+            rendered[size, extension] = buffer.getvalue()
+    return rendered
+
+
+def delete_variants(variants, keep=None):
+    kept = {path for formats in (keep or {}).values()
+            for path in formats.values()}
+    for formats in (variants or {}).values():
+        for path in formats.values():
+            if path not in kept:
+                default_storage.delete(path)
+
+
+def build_variants(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'id', 'image', 'image_variants'
+    ).first()
+    if recipe is None or not recipe.image:
+        return {}
+    with recipe.image.open('rb') as file:
+        source = file.read()
+    digest = hashlib.sha256(source).hexdigest()[:16]
+    variants = {}
+    for (size, extension), content in render_variants(
+            io.BytesIO(source)).items():
+        path = f'{VARIANTS_DIR}/{recipe_id}/{size}-{digest}.{extension}'
+        if not default_storage.exists(path):
+            path = default_storage.save(path, ContentFile(content))
+        variants.setdefault(size, {})[extension] = path
+    if Recipe.objects.filter(pk=recipe_id, image=recipe.image.name).update(
+        image_variants=variants, updated_at=timezone.now()
+    ):
+        bump_recipes(Recipe.objects.filter(pk=recipe_id))
+        delete_variants(recipe.image_variants, keep=variants)
+    return variants
+
+
+def _run(recipe_id):
+    try:
+        build_variants(recipe_id)
+    except Exception:
+        logger.exception('Не удалось обработать фото рецепта %s', recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(recipe_id):
+    """Ставит обработку фото в очередь после коммита транзакции."""
+    if settings.IMAGE_PIPELINE_BACKEND == 'sync':
+        transaction.on_commit(lambda: build_variants(recipe_id))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run, recipe_id))
+
+
+def variant_urls(variants, request=None):
+    urls = {}
+    for size, formats in (variants or {}).items():
+        urls[size] = {}
+        for extension, path in formats.items():
+            url = default_storage.url(path)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[size][extension] = url
+    return urls
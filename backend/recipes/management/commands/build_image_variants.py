@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии фото для существующих рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Только рецепты без готовых копий.'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if options['missing']:
+            queryset = queryset.filter(image_variants={})
+        done = 0
+        for recipe_id in queryset.values_list('id', flat=True).iterator():
+            if build_variants(recipe_id):
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано фото: {done}'))
@@ -0,0 +1,150 @@
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import UniqueConstraint
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.pagination import KeysetPagination, LimitPageNumberPagination
+from api.views import RecipeViewSet
+from recipes.models import Favorite, Ingredient, Recipe, Shopping, TagRecipe
+
+
+class Command(BaseCommand):
+    help = ('Проверяет через EXPLAIN, что запросы API используют индексы. '
+            'Запускать на заполненной базе (см. seed); индексы поиска '
+            'проверяются только на PostgreSQL.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help='Печатать планы целиком.'
+        )
+
+    def api_request(self, user, **params):
+        request = Request(APIRequestFactory().get('/api/recipes/', params))
+        request.user = user
+        return request
+
+    def list_queryset(self, request):
+        """Запрос списка так, как его строит RecipeViewSet: фильтры,
+        флаги пользователя и срез страницы с условием курсора."""
+        view = RecipeViewSet(request=request, action='list',
+                             format_kwarg=None, args=(), kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        if KeysetPagination.is_requested(request):
+            return KeysetPagination().get_page_queryset(queryset, request)
+        return queryset[:LimitPageNumberPagination.page_size]
+
+    def get_index_aliases(self):
+        """Имена индексов уникальных ограничений в планах SQLite.
+
+        SQLite называет такие индексы sqlite_autoindex_<таблица>_N,
+        соответствие находится по колонкам.
+        """
+        if connection.vendor != 'sqlite':
+            return {}
+        aliases = {}
+        with connection.cursor() as cursor:
+            for model in apps.get_models():
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(f'PRAGMA index_list({table})')
+                autoindexes = {}
+                for row in cursor.fetchall():
+                    if row[1].startswith('sqlite_autoindex_'):
+                        cursor.execute(f'PRAGMA index_info("{row[1]}")')
+                        columns = tuple(info[2] for info in cursor.fetchall())
+                        autoindexes[columns] = row[1]
+                for constraint in model._meta.constraints:
+                    if isinstance(constraint, UniqueConstraint):
+                        columns = tuple(
+                            model._meta.get_field(field).column
+                            for field in constraint.fields
+                        )
+                        if columns in autoindexes:
+                            aliases[constraint.name] = autoindexes[columns]
+        return aliases
+
+    def get_checks(self):
+        recipe = Recipe.objects.select_related('author').order_by(
+            'pk'
+        ).first()
+        if recipe is None:
+            raise CommandError('В базе нет рецептов.')
+        cursor = KeysetPagination().encode_cursor(recipe)
+        user = recipe.author
+        tag = recipe.tags.first()
+        checks = [
+            ('лента рецептов',
+             self.list_queryset(self.api_request(
+                 AnonymousUser(), cursor=cursor
+             )),
+             ('recipe_pub_date_idx',)),
+            ('рецепты автора с флагами пользователя',
+             self.list_queryset(self.api_request(
+                 user, author=user.pk, cursor=cursor
+             )),
+             ('recipe_author_pub_date_idx',
+              'favorite recipe for unique user', 'unique cart user')),
+            ('быстрые рецепты',
+             self.list_queryset(self.api_request(
+                 AnonymousUser(), ordering='quickest'
+             )),
+             ('recipe_cooking_time_idx',)),
+            ('теги рецептов страницы',
+             TagRecipe.objects.filter(
+                 recipe_id__in=[recipe.id]
+             ).values_list('tag_id'),
+             ('tagrecipe_recipe_tag_idx',)),
+            ('избранное по рецепту',
+             Favorite.objects.filter(recipe=recipe).values_list('user_id'),
+             ('favorite_recipe_user_idx',)),
+            ('корзины по рецепту',
+             Shopping.objects.filter(recipe=recipe).values_list('user_id'),
+             ('shopping_recipe_user_idx',)),
+        ]
+        if tag is not None:
+            checks.insert(2, (
+                'рецепты по тегу',
+                self.list_queryset(self.api_request(
+                    AnonymousUser(), tags=tag.slug, cursor=cursor
+                )),
+                ('unique tag in recipes',),
+            ))
+        if connection.vendor == 'postgresql':
+            ingredient = Ingredient.objects.order_by('pk').first()
+            checks.append((
+                'поиск рецептов',
+                self.list_queryset(self.api_request(
+                    AnonymousUser(), search=recipe.name.split()[0]
+                )),
+                ('recipes_recipe_search_vector',),
+            ))
+            if ingredient is not None:
+                checks.append((
+                    'подсказки ингредиентов',
+                    Ingredient.objects.filter(
+                        name__icontains=ingredient.name[:3]
+                    ).values_list('pk'),
+                    ('recipes_ingredient_name_trgm',),
+                ))
+        return checks
+
+    def handle(self, *args, **options):
+        failed = []
+        aliases = self.get_index_aliases()
+        for title, queryset, indexes in self.get_checks():
+            indexes = [aliases.get(index, index) for index in indexes]
+            plan = queryset.explain()
+            ok = all(index in plan for index in indexes)
+            if not ok:
+                failed.append(title)
+            style = self.style.SUCCESS if ok else self.style.ERROR
+            self.stdout.write(style(
+                f'{"OK" if ok else "FAIL"} {title}: {", ".join(indexes)}'
+            ))
+            if options['verbose_plans'] or not ok:
+                self.stdout.write(plan)
+        if failed:
+            raise CommandError(f'Индексы не используются: {", ".join(failed)}')
@@ -0,0 +1,59 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipeScore, Shopping
+from recipes.versions import SCORES, bump_scopes
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги рецептов для сортировок popular и '
+            'trending. Запускать периодически (cron).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def trending_scores(self):
+        """Добавления за окно с экспоненциальным затуханием по дням."""
+        now = timezone.now()
+        window_start = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+        half_life = settings.TRENDING_HALF_LIFE_DAYS
+        scores = defaultdict(float)
+        for model, weight in ((Favorite, 1.0),
+                              (Shopping, settings.TRENDING_CART_WEIGHT)):
+            buckets = model.objects.filter(
+                created__gte=window_start
+            ).annotate(day=TruncDate('created')).values(
+                'recipe_id', 'day'
+            ).annotate(total=Count('pk')).order_by()
+            for row in buckets.iterator():
+                age = (now.date() - row['day']).days
+                scores[row['recipe_id']] += (
+                    weight * row['total'] * 0.5 ** (age / half_life)
+                )
+        return scores
+
+    def handle(self, *args, **options):
+        trending = self.trending_scores()
+        scores = [
+            RecipeScore(recipe_id=pk, popular=favorites,
+                        trending=trending.get(pk, 0))
+            for pk, favorites in Recipe.objects.values_list(
+                'pk', 'favorites_count'
+            ).iterator()
+        ]
+        with transaction.atomic():
+            RecipeScore.objects.all().delete()
+            RecipeScore.objects.bulk_create(
+                scores, batch_size=options['batch_size']
+            )
+            bump_scopes(SCORES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги пересчитаны: {len(scores)}'
+        ))
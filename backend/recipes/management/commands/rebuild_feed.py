@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import backfill
+from recipes.models import FeedItem
+from users.models import Subscription
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает ленты подписок, например после смены '
+            'FEED_FANOUT_LIMIT.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            FeedItem.objects.all().delete()
+            for user_id, author_id in Subscription.objects.values_list(
+                    'user_id', 'author_id').iterator():
+                backfill(user_id, author_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {FeedItem.objects.count()}'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        ids = list(Recipe.objects.values_list('id', flat=True))
+        size = options['batch_size']
+        for start in range(0, len(ids), size):
+            update_search_index(*ids[start:start + size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано рецептов: {len(ids)}'
+        ))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import AMOUNT_EPSILON, ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает или проверяет таблицу списков покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сравнить с корзинами, ничего не меняя.'
+        )
+
+    def handle(self, *args, **options):
+        expected = {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total
+            in ShoppingListItem.objects.aggregate_from_carts()
+        }
+        if options['verify']:
+            actual = {
+                (user_id, ingredient_id): total
+                for user_id, ingredient_id, total
+                in ShoppingListItem.objects.values_list(
+                    'user_id', 'ingredient_id', 'total_amount'
+                )
+            }
+            mismatches = [
+                key for key in expected.keys() | actual.keys()
+                if abs(expected.get(key, 0) - actual.get(key, 0))
+                > AMOUNT_EPSILON
+            ]
+            if mismatches:
+                raise CommandError(
+                    f'Расхождений: {len(mismatches)}, '
+                    f'например {sorted(mismatches)[:10]}'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'OK, позиций: {len(actual)}'
+            ))
+            return
+        with transaction.atomic():
+            ShoppingListItem.objects.all().delete()
+            ShoppingListItem.objects.bulk_create(
+                (ShoppingListItem(user_id=user_id,
+                                  ingredient_id=ingredient_id,
+                                  total_amount=total)
+                 for (user_id, ingredient_id), total in expected.items()),
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано позиций: {len(expected)}'
+        ))
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, Shopping
+from users.models import AuthorStats, Subscription
+
+User = get_user_model()
+
+
+def count_related(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Сверяет и исправляет денормализованные счётчики.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.annotate(
+            real_favorites=count_related(Favorite, 'recipe'),
+            real_shopping=count_related(Shopping, 'recipe'),
+        ).filter(
+            ~Q(favorites_count=F('real_favorites'))
+            | ~Q(shopping_count=F('real_shopping'))
+        ).order_by()
+        drifted = list(recipes.only('id'))
+        for recipe in drifted:
+            recipe.favorites_count = recipe.real_favorites
+            recipe.shopping_count = recipe.real_shopping
+
+        stats = {
+            stat.author_id: stat for stat in AuthorStats.objects.all()
+        }
+        created, changed = [], []
+        for pk, recipes_count, subscribers_count in User.objects.annotate(
+                real_recipes=count_related(Recipe, 'author'),
+                real_subscribers=count_related(Subscription, 'author'),
+        ).values_list('pk', 'real_recipes', 'real_subscribers').iterator():
+            stat = stats.get(pk)
+            if stat is None:
+                created.append(AuthorStats(
+                    author_id=pk, recipes_count=recipes_count,
+                    subscribers_count=subscribers_count,
+                ))
+            elif (stat.recipes_count, stat.subscribers_count) != (
+                    recipes_count, subscribers_count):
+                stat.recipes_count = recipes_count
+                stat.subscribers_count = subscribers_count
+                changed.append(stat)
+
+        self.stdout.write(
+            f'Рецептов с расхождением: {len(drifted)}, '
+            f'авторов без счётчиков: {len(created)}, '
+            f'авторов с расхождением: {len(changed)}'
+        )
+        if options['dry_run']:
+            return
+        Recipe.objects.bulk_update(
+            drifted, ['favorites_count', 'shopping_count'], batch_size=500
+        )
+        AuthorStats.objects.bulk_create(created, batch_size=500)
+        AuthorStats.objects.bulk_update(
+            changed, ['recipes_count', 'subscribers_count'], batch_size=500
+        )
+        self.stdout.write(self.style.SUCCESS('Счётчики исправлены.'))
@@ -0,0 +1,245 @@
+import io
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes.models import (
+    Favorite, Ingredient, IngredientAmount, Recipe, Shopping, Tag, TagRecipe,
+)
+from recipes.versions import bump_recipes
+from users.models import Subscription, User
+
+PREFIX = 'seed_'
+PASSWORD = 'seed-password'
+IMAGE = 'recipes_photo/seed.jpg'
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F2C14E', 'dessert'),
+    ('Выпечка', '#C0392B', 'bakery'),
+)
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей',
+               'Елена', 'Дмитрий', 'Наталья', 'Алексей')
+LAST_NAMES = ('Иванова', 'Смирнов', 'Кузнецова', 'Попов', 'Соколова',
+              'Лебедев', 'Козлова', 'Новиков', 'Морозова', 'Волков')
+ADJECTIVES = ('Домашний', 'Быстрый', 'Пряный', 'Летний', 'Сырный',
+              'Бабушкин', 'Острый', 'Лёгкий', 'Праздничный', 'Томлёный')
+DISHES = ('суп', 'пирог', 'салат', 'плов', 'омлет', 'рагу', 'пудинг',
+          'гуляш', 'кекс', 'борщ', 'ризотто', 'рулет')
+SENTENCES = (
+    'Нарежьте овощи крупными кубиками.',
+    'Обжарьте всё на среднем огне до золотистого цвета.',
+    'Посолите, поперчите и перемешайте.',
+    'Тушите под крышкой до мягкости.',
+    'Выпекайте в разогретой духовке.',
+    'Подавайте горячим со свежей зеленью.',
+    'Дайте настояться перед подачей.',
+)
+
+# Пересчёт денормализованных данных, которые bulk_create не трогает.
+REBUILD_COMMANDS = (
+    'rebuild_shopping_list', 'reconcile_counters', 'rebuild_search_index',
+    'rebuild_feed', 'compute_recipe_scores',
+)
+
+
+def zipf_weights(size):
+    """Накопленные веса 1/rank: у популярных авторов и рецептов больше."""
+    return list(accumulate(1 / rank for rank in range(1, size + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, рецептами, '
+            'избранным, корзинами и подписками для бенчмарков. При '
+            'одинаковом --seed данные одни и те же (даты отсчитываются '
+            'от момента запуска). Нужны ингредиенты (см. loader).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument(
+            '--max-ingredients', type=int, default=12,
+            help='Ингредиентов в рецепте: от 2 до этого числа.'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=30,
+            help='В среднем рецептов в избранном у пользователя.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='В среднем рецептов в корзине у пользователя.'
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='В среднем подписок у пользователя.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help=f'Удалить прежних пользователей {PREFIX}* с их данными.'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        ingredient_ids = list(Ingredient.objects.order_by('pk').values_list(
+            'pk', flat=True
+        ))
+        if not ingredient_ids:
+            raise CommandError('Сначала загрузите ингредиенты: '
+                               'manage.py loader.')
+        seeded = User.objects.filter(username__startswith=PREFIX)
+        if options['clear']:
+            seeded.delete()
+        elif seeded.exists():
+            raise CommandError('Синтетические данные уже есть, '
+                               'перезапустите с --clear.')
+
+        started = time.monotonic()
+        self.save_image()
+        with transaction.atomic():
+            tag_ids = self.get_tags()
+            user_ids = self.create_users(options['users'])
+            recipe_ids = self.create_recipes(
+                user_ids, tag_ids, ingredient_ids, options
+            )
+            self.create_relations(user_ids, recipe_ids, options)
+        for command in REBUILD_COMMANDS:
+            call_command(command, stdout=self.stdout)
+        bump_recipes(Recipe.objects.filter(author__in=user_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(user_ids)}, рецептов '
+            f'{len(recipe_ids)} за {time.monotonic() - started:.1f} с.'
+        ))
+
+    def save_image(self):
+        if default_storage.exists(IMAGE):
+            return
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), '#E26C2D').save(buffer, 'JPEG')
+        default_storage.save(IMAGE, ContentFile(buffer.getvalue()))
+
+    def get_tags(self):
+        if not Tag.objects.exists():
+            for name, color, slug in DEFAULT_TAGS:
+                Tag.objects.create(name=name, color=color, slug=slug)
+        return list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+
+    def ago(self, days):
+        return self.now - timedelta(
+            minutes=self.rng.randint(0, days * 24 * 60)
+        )
+
+    def create_users(self, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (User(username=f'{PREFIX}{number:06d}',
+                  email=f'{PREFIX}{number:06d}@example.com',
+                  first_name=self.rng.choice(FIRST_NAMES),
+                  last_name=self.rng.choice(LAST_NAMES),
+                  password=password)
+             for number in range(count)),
+            batch_size=self.batch_size,
+        )
+        return list(User.objects.filter(
+            username__startswith=PREFIX
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def make_recipe(self, number, user_ids, author_weights):
+        return Recipe(
+            author_id=self.rng.choices(
+                user_ids, cum_weights=author_weights
+            )[0],
+            name=(f'{self.rng.choice(ADJECTIVES)} '
+                  f'{self.rng.choice(DISHES)} №{number}'),
+            text=' '.join(self.rng.sample(SENTENCES, 3)),
+            cooking_time=self.rng.randint(5, 180),
+            image=IMAGE,
+        )
+
+    def create_recipes(self, user_ids, tag_ids, ingredient_ids, options):
+        author_weights = zipf_weights(len(user_ids))
+        Recipe.objects.bulk_create(
+            (self.make_recipe(number, user_ids, author_weights)
+             for number in range(options['recipes'])),
+            batch_size=self.batch_size,
+        )
+        recipe_ids = list(Recipe.objects.filter(
+            author__in=user_ids
+        ).order_by('pk').values_list('pk', flat=True))
+        # bulk_create ставит pub_date = now, даты разносятся отдельно.
+        dates = [self.ago(365) for _ in recipe_ids]
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, pub_date=date, updated_at=date)
+             for pk, date in zip(recipe_ids, dates)],
+            ['pub_date', 'updated_at'], batch_size=self.batch_size,
+        )
+        TagRecipe.objects.bulk_create(
+            (TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+             for recipe_id in recipe_ids
+             for tag_id in self.rng.sample(
+                 tag_ids, self.rng.randint(1, min(3, len(tag_ids))))),
+            batch_size=self.batch_size,
+        )
+        most = min(options['max_ingredients'], len(ingredient_ids))
+        IngredientAmount.objects.bulk_create(
+            (IngredientAmount(recipe_id=recipe_id,
+                              ingredient_id=ingredient_id,
+                              amount=self.rng.randint(1, 50) * 10)
+             for recipe_id in recipe_ids
+             for ingredient_id in self.rng.sample(
+                 ingredient_ids, self.rng.randint(min(2, most), most))),
+            batch_size=self.batch_size,
+        )
+        return recipe_ids
+
+    def pick(self, population, weights, average, exclude=None):
+        if not population:
+            return set()
+        count = self.rng.randint(0, 2 * average)
+        picked = set(self.rng.choices(
+            population, cum_weights=weights, k=count
+        ))
+        picked.discard(exclude)
+        return picked
+
+    def create_relations(self, user_ids, recipe_ids, options):
+        recipe_weights = zipf_weights(len(recipe_ids))
+        author_weights = zipf_weights(len(user_ids))
+        favorites, carts, subscriptions = [], [], []
+        for user_id in user_ids:
+            favorites += [
+                Favorite(user_id=user_id, recipe_id=recipe_id,
+                         created=self.ago(60))
+                for recipe_id in sorted(self.pick(
+                    recipe_ids, recipe_weights, options['favorites']))
+            ]
+            carts += [
+                Shopping(user_id=user_id, recipe_id=recipe_id,
+                         created=self.ago(30))
+                for recipe_id in sorted(self.pick(
+                    recipe_ids, recipe_weights, options['carts']))
+            ]
+            subscriptions += [
+                Subscription(user_id=user_id, author_id=author_id)
+                for author_id in sorted(self.pick(
+                    user_ids, author_weights, options['subscriptions'],
+                    exclude=user_id))
+            ]
+        for model, objects in ((Favorite, favorites), (Shopping, carts),
+                               (Subscription, subscriptions)):
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
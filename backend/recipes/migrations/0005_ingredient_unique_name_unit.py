@@ -0,0 +1,58 @@
+# Generated by Django 3.2 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+def merge_rows(queryset, group_field, amount_field, keep_id):
+    """Переносит строки на keep_id; совпавшие по group_field — суммирует."""
+    kept = {
+        getattr(row, group_field): row
+        for row in queryset.model.objects.filter(ingredient_id=keep_id)
+    }
+    for row in queryset:
+        target = kept.get(getattr(row, group_field))
+        if target is None:
+            row.ingredient_id = keep_id
+            row.save(update_fields=['ingredient'])
+            kept[getattr(row, group_field)] = row
+            continue
+        setattr(target, amount_field,
+                getattr(target, amount_field) + getattr(row, amount_field))
+        target.save(update_fields=[amount_field])
+        row.delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientAmount = apps.get_model('recipes', 'IngredientAmount')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep_id=models.Min('pk'), total=models.Count('pk')
+    ).filter(total__gt=1).order_by()
+    for group in duplicates:
+        keep_id = group['keep_id']
+        extra = Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(pk=keep_id)
+        merge_rows(IngredientAmount.objects.filter(ingredient__in=extra),
+                   'recipe_id', 'amount', keep_id)
+        merge_rows(ShoppingListItem.objects.filter(ingredient__in=extra),
+                   'user_id', 'total_amount', keep_id)
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique ingredient unit'),
+        ),
+    ]
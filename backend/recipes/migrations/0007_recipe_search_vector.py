@@ -0,0 +1,65 @@
+# Generated by Django 3.2 on 2026-10-18 18:59
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+INGREDIENT_NAMES_SQL = (
+    "SELECT {agg}(i.name, ' ') FROM recipes_ingredientamount a "
+    'JOIN recipes_ingredient i ON i.id = a.ingredient_id '
+    'WHERE a.recipe_id = r.id'
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS recipes_recipe_search_vector '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+        names = INGREDIENT_NAMES_SQL.format(agg='string_agg')
+        schema_editor.execute(
+            'UPDATE recipes_recipe r SET search_vector = '
+            "setweight(to_tsvector(%s, r.name), 'A') || "
+            "setweight(to_tsvector(%s, r.text), 'B') || "
+            f"setweight(to_tsvector(%s, coalesce(({names}), '')), 'C')",
+            [settings.SEARCH_CONFIG] * 3,
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts '
+            'USING fts5(name, text, ingredients)'
+        )
+        names = INGREDIENT_NAMES_SQL.format(agg='group_concat')
+        schema_editor.execute(
+            'INSERT INTO recipes_recipe_fts (rowid, name, text, ingredients) '
+            f"SELECT r.id, r.name, r.text, coalesce(({names}), '') "
+            'FROM recipes_recipe r'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS recipes_recipe_search_vector'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS recipes_recipe_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_ingredient_name_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-18 19:38
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feeditem',
+            name='feeditem_user_pub_date_idx',
+        ),
+        migrations.RemoveField(
+            model_name='feeditem',
+            name='pub_date',
+        ),
+    ]
@@ -1,8 +1,18 @@
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import (
+    Exists, F, OuterRef, Prefetch, Sum, Value, Window,
+)
 from django.db.models.constraints import UniqueConstraint
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from users.models import Subscription, User
 
-from users.models import User
+AMOUNT_EPSILON = 1e-9
 
 
 class Tag(models.Model):
@@ -53,11 +63,73 @@ class Ingredient(models.Model):
         ordering = ('name',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            UniqueConstraint(fields=('name', 'measurement_unit'),
+                             name='unique ingredient unit')
+        ]
 
     def __str__(self):
         return self.name
 
 
+def get_recipe_prefetches():
+    return (
+        'recipes_tag',
+        Prefetch(
+            'ingredientamount_set',
+            queryset=IngredientAmount.objects.select_related('ingredient'),
+        ),
+    )
+
+
+class RecipeQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=models.BooleanField()),
+                is_in_shopping_cart=Value(
+                    False, output_field=models.BooleanField()
+                ),
+                is_subscribed=Value(False, output_field=models.BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(Shopping.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_subscribed=Exists(Subscription.objects.filter(
+                user=user, author=OuterRef('author'))),
+        )
+
+    def increment(self, field, delta=1):
+        """Атомарно сдвигает счётчик, не опуская его ниже нуля."""
+        return self.filter(**{f'{field}__gte': -delta}).update(
+            **{field: F(field) + delta}
+        )
+
+    def previews_by_author(self, author_ids, limit=None):
+        """Последние рецепты авторов одним запросом: {author_id: [...]}."""
+        if not author_ids:
+            return {}
+        queryset = self.filter(author__in=author_ids)
+        if limit is not None:
+            ranked = queryset.annotate(row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('author')],
+                order_by=[F('pub_date').desc(), F('id').desc()],
+            )).order_by()
+            sql, params = ranked.query.sql_with_params()
+            queryset = self.raw(
+                f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+                f'ORDER BY pub_date DESC, id DESC',
+                (*params, limit),
+            )
+        previews = defaultdict(list)
+        for recipe in queryset:
+            previews[recipe.author_id].append(recipe)
+        return previews
+
+
 class Recipe(models.Model):
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -109,6 +181,10 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
     text = models.TextField(verbose_name='Описание', )
     image = models.ImageField(
         verbose_name='Фото',
@@ -116,11 +192,39 @@ class Recipe(models.Model):
         null=False,
         blank=False
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    shopping_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные копии фото',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=('-pub_date', '-id'),
+                         name='recipe_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=('cooking_time', '-pub_date'),
+                         name='recipe_cooking_time_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -136,7 +240,8 @@ class TagRecipe(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
-        related_name='recipes_tag'
+        related_name='recipes_tag',
+        db_index=False,
     )
 
     class Meta:
@@ -146,6 +251,10 @@ class TagRecipe(models.Model):
             UniqueConstraint(fields=['tag', 'recipe'],
                              name='unique tag in recipes')
         ]
+        indexes = [
+            models.Index(fields=('recipe', 'tag'),
+                         name='tagrecipe_recipe_tag_idx'),
+        ]
 
     def __str__(self):
         return self.tag.name
@@ -194,6 +303,12 @@ class Shopping(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         related_name='shopping',
+        db_index=False,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        default=timezone.now,
+        editable=False,
     )
 
     class Meta:
@@ -204,6 +319,10 @@ class Shopping(models.Model):
             models.UniqueConstraint(fields=('user', 'recipe'),
                                     name='unique cart user')
         ]
+        indexes = [
+            models.Index(fields=('recipe', 'user'),
+                         name='shopping_recipe_user_idx'),
+        ]
 
     def __str__(self):
         return f'{self.recipe} в списке покупок {self.user}'
@@ -220,6 +339,12 @@ class Favorite(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         related_name='favorites',
+        db_index=False,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        default=timezone.now,
+        editable=False,
     )
 
     class Meta:
@@ -230,6 +355,178 @@ class Favorite(models.Model):
             models.UniqueConstraint(fields=('user', 'recipe'),
                                     name='favorite recipe for unique user')
         ]
+        indexes = [
+            models.Index(fields=('recipe', 'user'),
+                         name='favorite_recipe_user_idx'),
+        ]
 
     def __str__(self):
         return f'{self.recipe} в избранном у {self.user}'
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    def apply_delta(self, user_ids, deltas):
+        """Прибавляет {ingredient_id: amount} к спискам покупок."""
+        user_ids = list(user_ids)
+        deltas = {pk: amount for pk, amount in deltas.items() if amount}
+        if not user_ids or not deltas:
+            return
+        self.bulk_create(
+            [ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+             for user_id in user_ids for ingredient_id in deltas],
+            ignore_conflicts=True,
+        )
+        items = self.filter(user__in=user_ids, ingredient__in=deltas)
+        for item in items:
+            item.total_amount = (
+                F('total_amount') + deltas[item.ingredient_id]
+            )
+        self.bulk_update(items, ['total_amount'])
+        self.filter(
+            user__in=user_ids, total_amount__lte=AMOUNT_EPSILON
+        ).delete()
+
+    def add_recipe(self, user_ids, recipe, sign=1):
+        self.apply_delta(user_ids, {
+            ingredient_id: sign * amount
+            for ingredient_id, amount in IngredientAmount.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient_id', 'amount')
+        })
+
+    def remove_recipe(self, user_ids, recipe):
+        self.add_recipe(user_ids, recipe, sign=-1)
+
+    def aggregate_from_carts(self):
+        """Эталонные суммы, посчитанные по корзинам с нуля."""
+        return IngredientAmount.objects.filter(
+            recipe__shopping__isnull=False
+        ).values(
+            'recipe__shopping__user', 'ingredient'
+        ).annotate(total_amount=Sum('amount')).values_list(
+            'recipe__shopping__user', 'ingredient', 'total_amount'
+        ).order_by()
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+    )
+    total_amount = models.FloatField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            UniqueConstraint(fields=('user', 'ingredient'),
+                             name='unique shopping list ingredient')
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient}: {self.total_amount:g}'
+
+
+class RecipeScore(models.Model):
+    """Рейтинги для сортировки ленты, считает compute_recipe_scores."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+    )
+    popular = models.PositiveIntegerField(
+        verbose_name='Популярность',
+        default=0,
+    )
+    trending = models.FloatField(
+        verbose_name='Тренд',
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Пересчитано',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(fields=('-popular',),
+                         name='recipescore_popular_idx'),
+            models.Index(fields=('-trending',),
+                         name='recipescore_trending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe}: {self.popular}, {self.trending:.2f}'
+
+
+class FeedItem(models.Model):
+    """Рецепт в ленте подписок пользователя (fan-out on write)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False,
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            UniqueConstraint(fields=('user', 'recipe'),
+                             name='unique feed recipe')
+        ]
+        indexes = [
+            models.Index(fields=('user', '-pub_date', '-recipe'),
+                         name='feeditem_user_pub_date_idx'),
+            models.Index(fields=('user', 'author'),
+                         name='feeditem_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class ContentVersion(models.Model):
+    """Счётчик изменений справочника для ETag (см. recipes.versions)."""
+    name = models.CharField(
+        verbose_name='Справочник',
+        max_length=50,
+        primary_key=True,
+    )
+    version = models.PositiveBigIntegerField(
+        verbose_name='Версия',
+        default=1,
+    )
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -0,0 +1,104 @@
+"""Двухуровневый кэш справочников: LRU в процессе и общий кэш.
+
+Оба уровня привязаны к версии справочника (recipes.versions): данные
+второго лежат под ключом с версией, а первый хранит версию рядом с
+данными. Каждое чтение сверяет её с текущей — одно обращение к кэшу
+за числом вместо загрузки всего справочника, — поэтому после изменения
+тега или ингредиента в любом процессе старые данные не отдаются под
+новой версией. REFERENCE_CACHE_TTL ограничивает жизнь записей первого
+уровня.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Ingredient, Tag
+from recipes.versions import INGREDIENTS, TAGS, get_version
+
+CACHE_KEY = 'reference:{}:{}'
+
+LOADERS = {
+    TAGS: lambda: Tag.objects.values('id', 'name', 'color', 'slug'),
+    INGREDIENTS: lambda: Ingredient.objects.values(
+        'id', 'name', 'measurement_unit'
+    ),
+}
+
+
+class LocalLRUCache:
+    """Потокобезопасный LRU с временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRUCache(
+    settings.REFERENCE_CACHE_MAXSIZE, settings.REFERENCE_CACHE_TTL
+)
+
+
+def get_reference(name):
+    """Справочник целиком: {id: данные} в порядке сортировки модели."""
+    version = get_version(name)
+    entry = local_cache.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    key = CACHE_KEY.format(name, version)
+    data = cache.get(key)
+    if data is None:
+        data = {item['id']: item for item in LOADERS[name]()}
+        cache.set(key, data, settings.REFERENCE_CACHE_TIMEOUT)
+    local_cache.set(name, (version, data))
+    return data
+
+
+def get_tags(ids):
+    """Теги по id; при отсутствии id в кэше перечитывает справочник."""
+    ids = set(ids)
+    tags = get_reference(TAGS)
+    if not ids.issubset(tags):
+        local_cache.delete(TAGS)
+        tags = get_reference(TAGS)
+    return [tag for pk, tag in tags.items() if pk in ids]
+
+
+def invalidate(name):
+    local_cache.delete(name)
+
+
+def warm_up():
+    for name in LOADERS:
+        get_reference(name)
@@ -0,0 +1,122 @@
+"""Полнотекстовый поиск рецептов.
+
+На PostgreSQL используется поле Recipe.search_vector с GIN-индексом,
+на SQLite — виртуальная таблица FTS5 recipes_recipe_fts. Индекс
+обновляется сигналами Recipe и IngredientAmount (api.signals) после
+коммита транзакции, по разу на рецепт.
+"""
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import TextField, Value
+from django.db.models.expressions import RawSQL
+
+from recipes.models import IngredientAmount, Recipe
+
+FTS_TABLE = 'recipes_recipe_fts'
+
+_pending = threading.local()
+
+
+def _ingredient_names(recipe_ids):
+    names = {pk: [] for pk in recipe_ids}
+    for recipe_id, name in IngredientAmount.objects.filter(
+            recipe__in=recipe_ids
+    ).values_list('recipe_id', 'ingredient__name'):
+        names[recipe_id].append(name)
+    return {pk: ' '.join(items) for pk, items in names.items()}
+
+
+def update_search_index(*recipe_ids):
+    if not recipe_ids:
+        return
+    ingredients = _ingredient_names(recipe_ids)
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchVector
+
+        config = settings.SEARCH_CONFIG
+        for pk, names in ingredients.items():
+            Recipe.objects.filter(pk=pk).update(search_vector=(
+                SearchVector('name', weight='A', config=config)
+                + SearchVector('text', weight='B', config=config)
+                + SearchVector(Value(names, output_field=TextField()),
+                               weight='C', config=config)
+            ))
+    elif connection.vendor == 'sqlite':
+        rows = Recipe.objects.filter(pk__in=recipe_ids).values_list(
+            'id', 'name', 'text'
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk in recipe_ids],
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients) '
+                'VALUES (%s, %s, %s, %s)',
+                [(pk, name, text, ingredients[pk])
+                 for pk, name, text in rows],
+            )
+
+
+def _get_pending():
+    if not hasattr(_pending, 'ids'):
+        _pending.ids = set()
+    return _pending.ids
+
+
+def _flush_pending():
+    pending = _get_pending()
+    recipe_ids = list(pending)
+    pending.clear()
+    update_search_index(*recipe_ids)
+
+
+def schedule_search_index(*recipe_ids):
+    """Обновит индекс рецептов после коммита.
+
+    Обратные вызовы копятся по одному на сигнал, но работу делает
+    первый из них, остальные находят пустое множество. id из
+    откатившейся транзакции переиндексируются при следующем коммите,
+    это безвредно.
+    """
+    _get_pending().update(recipe_ids)
+    transaction.on_commit(_flush_pending)
+
+
+def remove_from_search_index(recipe_id):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (recipe_id,)
+            )
+
+
+def search_recipes(queryset, query):
+    """Оставляет подходящие рецепты и сортирует их по релевантности."""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return queryset
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(
+            ' '.join(words), config=settings.SEARCH_CONFIG
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank('search_vector', search_query)
+        ).order_by('-search_rank', '-pub_date')
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in words)
+        # bm25() отрицателен: чем меньше, тем релевантнее.
+        return queryset.annotate(search_rank=RawSQL(
+            f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE}.rowid = {Recipe._meta.db_table}.id '
+            f'AND {FTS_TABLE} MATCH %s',
+            (match,),
+        )).filter(search_rank__isnull=False).order_by(
+            'search_rank', '-pub_date'
+        )
+    return queryset.filter(name__icontains=query)
@@ -0,0 +1,75 @@
+"""Фабрики данных и сброс кэшей для тестов."""
+from itertools import count
+
+from django.core.cache import cache
+
+from recipes import reference
+from recipes.models import (
+    Ingredient, IngredientAmount, Recipe, Tag, TagRecipe,
+)
+from users.models import User
+
+IMAGE = 'recipes_photo/test.jpg'
+
+_numbers = count(1)
+
+
+def clear_caches():
+    """Общий кэш и кэши процесса: тесты не должны видеть друг друга."""
+    from api.authentication import local_cache as token_cache
+    from api.autocomplete import memory_backend
+
+    cache.clear()
+    reference.local_cache.clear()
+    token_cache.clear()
+    memory_backend.reset()
+
+
+def create_user(**fields):
+    number = next(_numbers)
+    fields = {
+        'username': f'user{number}',
+        'email': f'user{number}@example.com',
+        'first_name': 'Имя',
+        'last_name': 'Фамилия',
+        **fields,
+    }
+    return User.objects.create_user(password='Password-123', **fields)
+
+
+def create_tag(**fields):
+    number = next(_numbers)
+    return Tag.objects.create(**{
+        'name': f'Тег {number}',
+        'color': f'#{number:06X}',
+        'slug': f'tag{number}',
+        **fields,
+    })
+
+
+def create_ingredient(**fields):
+    number = next(_numbers)
+    return Ingredient.objects.create(**{
+        'name': f'Ингредиент {number}',
+        'measurement_unit': 'г',
+        **fields,
+    })
+
+
+def create_recipe(author, tags=(), ingredients=(), **fields):
+    """ingredients — пары (ингредиент, количество)."""
+    number = next(_numbers)
+    recipe = Recipe.objects.create(author=author, **{
+        'name': f'Рецепт {number}',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': IMAGE,
+        **fields,
+    })
+    for tag in tags:
+        TagRecipe.objects.create(recipe=recipe, tag=tag)
+    for ingredient, amount in ingredients:
+        IngredientAmount.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    return recipe
@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, Recipe
+from recipes.tests.factories import clear_caches, create_recipe, create_user
+from users.models import AuthorStats
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.author = create_user()
+        self.recipe = create_recipe(self.author)
+
+    def get_counts(self):
+        return Recipe.objects.values_list(
+            'favorites_count', 'shopping_count'
+        ).get(pk=self.recipe.pk)
+
+    def get_stats(self):
+        return AuthorStats.objects.values_list(
+            'recipes_count', 'subscribers_count'
+        ).get(author=self.author)
+
+    def test_favorite_and_cart_endpoints(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.client.post(f'{url}favorite/')
+        self.client.post(f'{url}shopping_cart/')
+        self.assertEqual(self.get_counts(), (1, 1))
+
+        self.client.delete(f'{url}favorite/')
+        self.client.delete(f'{url}shopping_cart/')
+        self.assertEqual(self.get_counts(), (0, 0))
+
+    def test_author_stats(self):
+        other = create_recipe(self.author)
+        self.client.post(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(self.get_stats(), (2, 1))
+
+        other.delete()
+        self.client.delete(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(self.get_stats(), (1, 0))
+
+    def test_reconcile_fixes_drift(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            favorites_count=5, shopping_count=3
+        )
+        AuthorStats.objects.filter(author=self.author).update(
+            recipes_count=0
+        )
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        self.assertEqual(self.get_counts(), (1, 0))
+        self.assertEqual(self.get_stats(), (1, 0))
@@ -0,0 +1,116 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from recipes.models import FeedItem
+from recipes.tests.factories import (
+    clear_caches, create_recipe, create_tag, create_user,
+)
+from users.models import Subscription
+
+
+@override_settings(FEED_FANOUT_LIMIT=2)
+class FeedTests(APITestCase):
+    url = '/api/recipes/feed/'
+
+    def setUp(self):
+        clear_caches()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def subscribe(self, author, *users):
+        for user in users:
+            Subscription.objects.create(user=user, author=author)
+
+    def get_feed_ids(self, limit=50):
+        ids, url = [], f'{self.url}?limit={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), limit)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(ids), len(set(ids)))
+        return ids
+
+    def test_mixes_fanned_out_and_pulled_authors(self):
+        fanned, pulled, stranger = create_user(), create_user(), create_user()
+        # Ещё один подписчик у fanned: записи ленты есть у двоих.
+        self.subscribe(fanned, self.user, create_user())
+        # Рецепты pulled успели разложиться по лентам двух подписчиков,
+        # затем подписчиков стало больше лимита.
+        self.subscribe(pulled, create_user(), create_user())
+        recipes = [create_recipe(fanned), create_recipe(pulled),
+                   create_recipe(stranger)]
+        self.subscribe(pulled, self.user)
+        recipes += [create_recipe(fanned), create_recipe(pulled)]
+
+        self.assertEqual(FeedItem.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(FeedItem.objects.filter(author=pulled).count(), 2)
+        expected = [recipe.id for recipe in reversed(recipes)
+                    if recipe.author != stranger]
+        self.assertEqual(self.get_feed_ids(), expected)
+
+    def test_pages_merge_both_parts_of_feed(self):
+        fanned, pulled = create_user(), create_user()
+        self.subscribe(fanned, self.user)
+        self.subscribe(pulled, self.user, create_user(), create_user())
+        recipes = [create_recipe(author)
+                   for _ in range(4) for author in (fanned, pulled, fanned)]
+        expected = [recipe.id for recipe in reversed(recipes)]
+
+        self.assertEqual(self.get_feed_ids(limit=5), expected)
+        self.assertEqual(self.get_feed_ids(limit=1), expected)
+
+    def test_filters_apply_to_feed(self):
+        author = create_user()
+        self.subscribe(author, self.user)
+        tag = create_tag()
+        tagged = create_recipe(author, tags=[tag])
+        create_recipe(author)
+
+        response = self.client.get(self.url, {'tags': tag.slug})
+
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [tagged.id],
+        )
+
+    def test_page_is_read_by_feed_index(self):
+        author = create_user()
+        self.subscribe(author, self.user)
+        create_recipe(author)
+        create_recipe(author)
+        next_page = self.client.get(self.url, {'limit': 1}).data['next']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(next_page)
+        sql = next(query['sql'] for query in queries
+                   if 'FROM "recipes_feeditem"' in query['sql'])
+        explain = ('EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite'
+                   else 'EXPLAIN')
+        with connection.cursor() as cursor:
+            cursor.execute(f'{explain} {sql}')
+            plan = str(cursor.fetchall())
+
+        self.assertIn('feeditem_user_pub_date_idx', plan)
+
+    def test_unsubscribe_prunes_feed(self):
+        author, other = create_user(), create_user()
+        recipe = create_recipe(author)
+        other_recipe = create_recipe(other)
+        for followed in (author, other):
+            response = self.client.post(
+                f'/api/users/{followed.id}/subscribe/'
+            )
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_feed_ids(), [other_recipe.id, recipe.id])
+
+        response = self.client.delete(f'/api/users/{author.id}/subscribe/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(FeedItem.objects.filter(
+            user=self.user, author=author
+        ).exists())
+        self.assertEqual(self.get_feed_ids(), [other_recipe.id])
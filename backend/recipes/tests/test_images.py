@@ -0,0 +1,91 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from recipes.images import VARIANTS
+from recipes.models import Recipe
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_tag, create_user,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_data_url(size=(1600, 1000), color='green'):
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x010F] = 'Камера'
+    Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/jpeg;base64,{encoded}'
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PIPELINE_BACKEND='sync')
+class ImageVariantsTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        clear_caches()
+        self.client.force_authenticate(create_user())
+
+    def send(self, method, url, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url, {
+                'name': 'Салат', 'text': 'Нарезать', 'cooking_time': 5,
+                'tags': [create_tag().id],
+                'ingredients': [{'id': create_ingredient().id, 'amount': 1}],
+                'image': make_data_url(),
+                **fields,
+            }, format='json')
+
+    def create_recipe(self):
+        response = self.send('post', '/api/recipes/')
+        self.assertEqual(response.status_code, 201)
+        return Recipe.objects.get(pk=response.data['id'])
+
+    def test_variants_are_built_after_commit(self):
+        recipe = self.create_recipe()
+
+        self.assertEqual(set(recipe.image_variants), set(VARIANTS))
+        for size, width in VARIANTS.items():
+            for path in recipe.image_variants[size].values():
+                with default_storage.open(path) as file, \
+                        Image.open(file) as image:
+                    self.assertLessEqual(max(image.size), width)
+                    self.assertNotIn(0x010F, image.getexif())
+
+    def test_variant_urls_in_detail(self):
+        recipe = self.create_recipe()
+
+        response = self.client.get(f'/api/recipes/{recipe.id}/')
+
+        urls = response.data['image_variants']
+        self.assertEqual(set(urls), set(VARIANTS))
+        self.assertTrue(urls['list']['webp'].startswith('http://testserver/'))
+
+    def test_new_image_gets_new_variant_urls(self):
+        recipe = self.create_recipe()
+        old_paths = [path for formats in recipe.image_variants.values()
+                     for path in formats.values()]
+
+        response = self.send('patch', f'/api/recipes/{recipe.id}/',
+                             image=make_data_url(color='red'))
+        self.assertEqual(response.status_code, 200)
+
+        recipe.refresh_from_db()
+        new_paths = [path for formats in recipe.image_variants.values()
+                     for path in formats.values()]
+        self.assertFalse(set(old_paths) & set(new_paths))
+        for path in old_paths:
+            self.assertFalse(default_storage.exists(path))
+        for path in new_paths:
+            self.assertTrue(default_storage.exists(path))
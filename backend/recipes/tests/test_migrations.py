@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Откатывает recipes до migrate_from и накатывает migrate_to."""
+
+    migrate_from = migrate_to = None
+
+    def setUp(self):
+        self.migrate(self.migrate_from)
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def migrate(self, targets):
+        if isinstance(targets, str):
+            targets = [('recipes', targets)]
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+
+class FillCreatedTests(MigrationTestCase):
+    migrate_from = '0010_recipe_counters'
+    migrate_to = '0011_recipe_scores'
+
+    def test_existing_rows_get_recipe_pub_date(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model(settings.AUTH_USER_MODEL)
+        Recipe = apps.get_model('recipes', 'Recipe')
+        user = User.objects.create(username='user', email='user@ya.ru')
+        recipe = Recipe.objects.create(
+            author=user, name='Суп', text='Суп', cooking_time=5,
+            image='recipes_photo/test.jpg',
+        )
+        Recipe.objects.filter(pk=recipe.pk).update(
+            pub_date='2020-01-01T00:00:00Z'
+        )
+        for name in ('Favorite', 'Shopping'):
+            apps.get_model('recipes', name).objects.create(
+                user=user, recipe=recipe
+            )
+
+        apps = self.migrate(self.migrate_to)
+
+        pub_date = apps.get_model('recipes', 'Recipe').objects.get().pub_date
+        for name in ('Favorite', 'Shopping'):
+            self.assertEqual(
+                apps.get_model('recipes', name).objects.get().created,
+                pub_date,
+            )
+
+
+class MergeDuplicateIngredientsTests(MigrationTestCase):
+    migrate_from = '0004_shoppinglistitem'
+    migrate_to = '0005_ingredient_unique_name_unit'
+
+    def test_duplicates_are_merged_before_constraint(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model(settings.AUTH_USER_MODEL)
+        Recipe = apps.get_model('recipes', 'Recipe')
+        Ingredient = apps.get_model('recipes', 'Ingredient')
+        IngredientAmount = apps.get_model('recipes', 'IngredientAmount')
+        ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+        user = User.objects.create(username='user', email='user@ya.ru')
+        first, second = (
+            Recipe.objects.create(
+                author=user, name=name, text=name, cooking_time=5,
+                image='recipes_photo/test.jpg',
+            ) for name in ('Суп', 'Каша')
+        )
+        salt, salt_copy, salt_copy2 = (
+            Ingredient.objects.create(name='соль', measurement_unit='г')
+            for _ in range(3)
+        )
+        Ingredient.objects.create(name='соль', measurement_unit='кг')
+        IngredientAmount.objects.create(
+            recipe=first, ingredient=salt, amount=5
+        )
+        IngredientAmount.objects.create(
+            recipe=first, ingredient=salt_copy, amount=3
+        )
+        IngredientAmount.objects.create(
+            recipe=second, ingredient=salt_copy2, amount=2
+        )
+        ShoppingListItem.objects.create(
+            user=user, ingredient=salt_copy, total_amount=8
+        )
+        ShoppingListItem.objects.create(
+            user=user, ingredient=salt_copy2, total_amount=2
+        )
+
+        apps = self.migrate(self.migrate_to)
+
+        Ingredient = apps.get_model('recipes', 'Ingredient')
+        self.assertEqual(
+            Ingredient.objects.filter(name='соль').count(), 2
+        )
+        self.assertEqual(set(apps.get_model(
+            'recipes', 'IngredientAmount'
+        ).objects.values_list('recipe_id', 'ingredient_id', 'amount')), {
+            (first.id, salt.id, 8), (second.id, salt.id, 2),
+        })
+        self.assertEqual(list(apps.get_model(
+            'recipes', 'ShoppingListItem'
+        ).objects.values_list('ingredient_id', 'total_amount')), [
+            (salt.id, 10),
+        ])
+
+
+class FillFeedPubDateTests(MigrationTestCase):
+    migrate_from = '0014_feeditem_drop_pub_date'
+    migrate_to = '0015_feeditem_pub_date'
+
+    def test_existing_items_get_recipe_pub_date(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model(settings.AUTH_USER_MODEL)
+        user = User.objects.create(username='user', email='user@ya.ru')
+        recipe = apps.get_model('recipes', 'Recipe').objects.create(
+            author=user, name='Суп', text='Суп', cooking_time=5,
+            image='recipes_photo/test.jpg',
+        )
+        apps.get_model('recipes', 'FeedItem').objects.create(
+            user=user, recipe=recipe, author=user
+        )
+
+        apps = self.migrate(self.migrate_to)
+
+        self.assertEqual(
+            apps.get_model('recipes', 'FeedItem').objects.get().pub_date,
+            apps.get_model('recipes', 'Recipe').objects.get().pub_date,
+        )
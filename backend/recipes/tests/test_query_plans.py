@@ -0,0 +1,71 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from recipes.management.commands.check_query_plans import Command
+from recipes.models import Ingredient
+from recipes.tests.factories import (
+    create_ingredient, create_recipe, create_tag, create_user,
+)
+
+
+class CheckQueryPlansTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tag = create_tag()
+        ingredient = create_ingredient(name='Мука пшеничная')
+        for _ in range(3):
+            create_recipe(create_user(), tags=[tag], name='Суп гороховый',
+                          ingredients=[(ingredient, 10)])
+
+    def setUp(self):
+        self.command = Command()
+        self.aliases = self.command.get_index_aliases()
+
+    def assertUsesIndexes(self, queryset, indexes):
+        plan = queryset.explain()
+        for index in indexes:
+            self.assertIn(self.aliases.get(index, index), plan)
+
+    def test_checks_use_viewset_querysets(self):
+        checks = {title: str(queryset.query)
+                  for title, queryset, _ in self.command.get_checks()}
+
+        author_sql = checks['рецепты автора с флагами пользователя']
+        self.assertIn('EXISTS', author_sql)
+        self.assertIn('"pub_date" <', author_sql)
+        self.assertIn('"recipes_tag"."slug" =', checks['рецепты по тегу'])
+        self.assertIn('ORDER BY "recipes_recipe"."cooking_time" ASC',
+                      checks['быстрые рецепты'])
+
+    def test_queries_use_named_indexes(self):
+        for title, queryset, indexes in self.command.get_checks():
+            with self.subTest(title):
+                self.assertUsesIndexes(queryset, indexes)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Имена индексов SQLite')
+    def test_unique_constraints_resolve_to_autoindexes(self):
+        self.assertRegex(
+            self.aliases['favorite recipe for unique user'],
+            r'^sqlite_autoindex_recipes_favorite_\d+$',
+        )
+
+    def test_command_passes(self):
+        call_command('check_query_plans', stdout=StringIO())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Индексы PostgreSQL')
+    def test_search_indexes(self):
+        with connection.cursor() as cursor:
+            # На маленькой таблице планировщик иначе выберет Seq Scan.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        checks = {title: (queryset, indexes)
+                  for title, queryset, indexes in self.command.get_checks()}
+        self.assertUsesIndexes(*checks['поиск рецептов'])
+        self.assertUsesIndexes(*checks['подсказки ингредиентов'])
+        self.assertUsesIndexes(
+            Ingredient.objects.filter(name__icontains='пшен'),
+            ('recipes_ingredient_name_trgm',),
+        )
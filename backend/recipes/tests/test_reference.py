@@ -0,0 +1,54 @@
+from rest_framework.test import APITestCase
+
+from recipes import reference
+from recipes.models import Ingredient, Tag
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_tag,
+)
+from recipes.versions import INGREDIENTS, TAGS, bump_version
+
+
+class ReferenceCacheTests(APITestCase):
+    def setUp(self):
+        clear_caches()
+        self.tag = create_tag(name='Завтрак')
+
+    def test_version_bump_from_another_process_reloads_local_cache(self):
+        first = self.client.get('/api/tags/')
+        # Другой воркер: изменение в базе и сдвиг версии, но без сброса
+        # LRU этого процесса.
+        Tag.objects.filter(pk=self.tag.pk).update(name='Обед')
+        bump_version(TAGS)
+
+        second = self.client.get('/api/tags/')
+
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(second.data[0]['name'], 'Обед')
+
+    def test_tag_save_invalidates_reference(self):
+        reference.get_reference(TAGS)
+        self.tag.name = 'Ужин'
+        self.tag.save()
+
+        self.assertEqual(
+            reference.get_reference(TAGS)[self.tag.pk]['name'], 'Ужин'
+        )
+
+    def test_warm_reference_is_served_without_queries(self):
+        self.client.get('/api/tags/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/tags/{self.tag.pk}/')
+        self.assertEqual(response.data['slug'], self.tag.slug)
+
+    def test_ingredient_change_invalidates_reference(self):
+        ingredient = create_ingredient(name='Мука')
+        self.assertIn(ingredient.pk, reference.get_reference(INGREDIENTS))
+        Ingredient.objects.filter(pk=ingredient.pk).update(name='Сахар')
+        ingredient.refresh_from_db()
+        ingredient.save()
+
+        self.assertEqual(
+            reference.get_reference(INGREDIENTS)[ingredient.pk]['name'],
+            'Сахар',
+        )
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, RecipeScore, Shopping
+from recipes.tests.factories import clear_caches, create_recipe, create_user
+
+
+class RecipeOrderingTests(APITestCase):
+    url = '/api/recipes/'
+
+    def setUp(self):
+        clear_caches()
+        author = create_user()
+        self.quick = create_recipe(author, cooking_time=5)
+        self.loved = create_recipe(author, cooking_time=60)
+        self.hot = create_recipe(author, cooking_time=30)
+        old = timezone.now() - timedelta(days=60)
+        for _ in range(3):
+            Favorite.objects.create(
+                user=create_user(), recipe=self.loved, created=old
+            )
+        Favorite.objects.create(user=create_user(), recipe=self.hot)
+        Shopping.objects.create(user=create_user(), recipe=self.hot)
+
+    def get_ids(self, ordering):
+        response = self.client.get(self.url, {'ordering': ordering})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_orderings(self):
+        call_command('compute_recipe_scores', stdout=StringIO())
+
+        self.assertEqual(self.get_ids('popular'),
+                         [self.loved.id, self.hot.id, self.quick.id])
+        # Старые добавления в окно trending не попадают.
+        self.assertEqual(self.get_ids('trending'),
+                         [self.hot.id, self.loved.id, self.quick.id])
+        self.assertEqual(self.get_ids('quickest'),
+                         [self.quick.id, self.hot.id, self.loved.id])
+
+    def test_recompute_invalidates_cached_pages(self):
+        self.get_ids('popular')
+
+        call_command('compute_recipe_scores', stdout=StringIO())
+
+        self.assertEqual(RecipeScore.objects.count(), 3)
+        self.assertEqual(self.get_ids('popular')[0], self.loved.id)
+
+    def test_unknown_ordering(self):
+        response = self.client.get(self.url, {'ordering': 'random'})
+
+        self.assertEqual(response.status_code, 400)
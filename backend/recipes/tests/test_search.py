@@ -0,0 +1,68 @@
+from rest_framework.test import APITestCase
+
+from recipes.models import IngredientAmount
+from recipes.tests.factories import (
+    clear_caches, create_ingredient, create_recipe, create_user,
+)
+
+
+class SearchIndexTests(APITestCase):
+    url = '/api/recipes/'
+
+    def setUp(self):
+        clear_caches()
+        self.author = create_user()
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_plain_save_updates_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = create_recipe(self.author, name='Борщ')
+        self.assertEqual(self.search('борщ'), [recipe.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.name = 'Солянка'
+            recipe.save()
+
+        self.assertEqual(self.search('борщ'), [])
+        self.assertEqual(self.search('солянка'), [recipe.id])
+
+    def test_ingredient_amount_changes_update_index(self):
+        ingredient = create_ingredient(name='Шафран')
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = create_recipe(self.author, name='Плов')
+        with self.captureOnCommitCallbacks(execute=True):
+            IngredientAmount.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1
+            )
+        self.assertEqual(self.search('шафран'), [recipe.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            IngredientAmount.objects.filter(recipe=recipe).delete()
+
+        self.assertEqual(self.search('шафран'), [])
+
+    def test_one_reindex_per_transaction(self):
+        ingredients = [create_ingredient() for _ in range(3)]
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_recipe(self.author, ingredients=[
+                (ingredient, 10) for ingredient in ingredients
+            ])
+        # Первый обратный вызов переиндексирует, остальные пусты.
+        with self.assertNumQueries(4):
+            for callback in callbacks:
+                callback()
+
+    def test_cursor_request_keeps_relevance_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            best = create_recipe(self.author, name='Суп суп суп')
+            create_recipe(self.author, name='Каша', text='Не суп')
+            other = create_recipe(self.author, name='Суп')
+
+        ids = self.search('суп', pagination='cursor')
+
+        self.assertEqual(ids[0], best.id)
+        self.assertEqual(set(ids[1:]), {other.id, best.id + 1})
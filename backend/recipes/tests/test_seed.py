@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from recipes.models import Favorite, Recipe, Shopping, ShoppingListItem
+from recipes.tests.factories import clear_caches, create_ingredient
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeedTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        clear_caches()
+        for _ in range(5):
+            create_ingredient()
+
+    def seed(self, *args):
+        call_command(
+            'seed', '--users', '8', '--recipes', '20', '--favorites', '3',
+            '--carts', '2', '--subscriptions', '2', *args, stdout=StringIO(),
+        )
+        return (
+            list(Recipe.objects.order_by('pk').values_list(
+                'name', 'author__username', 'cooking_time'
+            )),
+            sorted(Favorite.objects.values_list(
+                'user__username', 'recipe__name'
+            )),
+        )
+
+    def test_same_seed_gives_same_data(self):
+        first = self.seed('--seed', '7')
+
+        self.assertEqual(self.seed('--seed', '7', '--clear'), first)
+        self.assertNotEqual(self.seed('--seed', '8', '--clear'), first)
+
+    def test_denormalized_data_is_rebuilt(self):
+        self.seed()
+
+        self.assertEqual(
+            set(ShoppingListItem.objects.values_list(
+                'user', 'ingredient', 'total_amount'
+            )),
+            set(ShoppingListItem.objects.aggregate_from_carts()),
+        )
+        for recipe in Recipe.objects.annotate(
+                real_favorites=Count('favorites', distinct=True),
+                real_carts=Count('shopping', distinct=True)):
+            self.assertEqual(recipe.favorites_count, recipe.real_favorites)
+            self.assertEqual(recipe.shopping_count, recipe.real_carts)
+        self.assertTrue(Shopping.objects.exists())
@@ -0,0 +1,90 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from recipes.models import ContentVersion
+
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+
+CACHE_KEY = 'content_version:{}'
+
+# Версии областей кэша ответов о рецептах (api.response_cache). Живут
+# только в кэше: пропавший ключ получает новое значение из time_ns,
+# так что старые ответы после вытеснения не оживают.
+ALL_RECIPES = 'recipes_version:all'
+SCORES = 'recipes_version:scores'
+RECIPE_SCOPE = 'recipes_version:recipe:{}'
+AUTHOR_SCOPE = 'recipes_version:author:{}'
+TAG_SCOPE = 'recipes_version:tag:{}'
+
+
+def get_version(name):
+    """Текущая версия справочника: из кэша, при промахе — из базы."""
+    key = CACHE_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        version = ContentVersion.objects.filter(name=name).values_list(
+            'version', flat=True
+        ).first() or 1
+        cache.set(key, version, None)
+    return version
+
+
+def bump_version(*names):
+    """Увеличивает версии; счётчик в базе переживает очистку кэша."""
+    for name in names:
+        updated = ContentVersion.objects.filter(name=name).update(
+            version=F('version') + 1
+        )
+        if not updated:
+            ContentVersion.objects.get_or_create(
+                name=name, defaults={'version': 2}
+            )
+    keys = [CACHE_KEY.format(name) for name in names]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_scope_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _incr(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def bump_scopes(*keys):
+    """Сдвигает версии сразу и ещё раз после коммита транзакции."""
+    _incr(keys)
+    transaction.on_commit(lambda: _incr(keys))
+
+
+def recipe_scopes(recipe_ids=(), author_ids=(), tag_slugs=()):
+    return [
+        ALL_RECIPES,
+        *(RECIPE_SCOPE.format(pk) for pk in set(recipe_ids)),
+        *(AUTHOR_SCOPE.format(pk) for pk in set(author_ids)),
+        *(TAG_SCOPE.format(slug) for slug in set(tag_slugs)),
+    ]
+
+
+def bump_recipes(queryset):
+    """Сбрасывает ответы о рецептах из queryset, их авторах и тегах."""
+    rows = list(queryset.values_list('id', 'author_id', 'tags__slug'))
+    if rows:
+        recipe_ids, author_ids, tag_slugs = zip(*rows)
+        bump_scopes(*recipe_scopes(
+            recipe_ids, author_ids, filter(None, tag_slugs)
+        ))
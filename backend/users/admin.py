@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Subscription
+from .models import AuthorStats, Subscription
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -18,3 +18,11 @@ class SubscriptionAdmin(admin.ModelAdmin):
     search_fields = ('user',)
     list_filter = ('user',)
     empty_value_display = '--пусто--'
+
+
+@admin.register(AuthorStats)
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = ('author', 'recipes_count', 'subscribers_count')
+    list_select_related = ('author',)
+    search_fields = ('author__username',)
+    empty_value_display = '--пусто--'
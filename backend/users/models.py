@@ -25,3 +25,35 @@ class Subscription(models.Model):
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики автора'
+        verbose_name_plural = 'Счётчики авторов'
+
+    def __str__(self):
+        return f'{self.author}: {self.recipes_count} рецептов'
+
+    @classmethod
+    def increment(cls, author_id, field, delta=1):
+        if delta > 0:
+            cls.objects.get_or_create(author_id=author_id)
+        cls.objects.filter(
+            author_id=author_id, **{f'{field}__gte': -delta}
+        ).update(**{field: models.F(field) + delta})